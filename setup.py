@@ -20,6 +20,15 @@ setup(
     packages=find_packages(exclude=["tests*", "*.tests"]),
     include_package_data=True,
     install_requires=["pandas>=1.0.0", "requests>=2.32.4", "python-dotenv>=1.1.1", "pydantic>=2.0.0", "openai>=2.11.0", "json-repair>=0.57.1"],
+    extras_require={
+        "dev": ["pytest>=7.0", "pytest-xdist>=3.0"],
+        "fast": ["orjson>=3.6"],
+        "async": ["httpx>=0.23"],
+        "http2": ["httpx[http2]>=0.23"],
+        "stream": ["requests-toolbelt>=1.0"],
+        "arrow": ["pyarrow>=10.0"],
+        "zstd": ["zstandard>=0.18"],
+    },
     classifiers=[
         "Development Status :: 3 - Alpha",
         "Intended Audience :: Developers",
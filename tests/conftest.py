@@ -0,0 +1,328 @@
+"""
+Shared pytest fixtures: an in-memory fake of the WaveAssist HTTP backend, a
+module-scoped initialized SDK, and a reset of SDK state for init tests.
+"""
+import gzip
+import json as _json
+import os
+from types import SimpleNamespace
+from typing import Dict, List, Literal, Optional
+
+import pandas as pd
+import pytest
+from pydantic import BaseModel, ConfigDict, Field
+
+import waveassist
+import waveassist.utils
+from waveassist import init, _config
+from waveassist.constants import API_BASE_URL
+
+
+class MockStore:
+    """Dummy in-memory key/value store.
+
+    reset() rebinds a fresh dict instead of clearing the old one, so the cost
+    is constant no matter how large the stored payloads (e.g. DataFrames) are.
+    """
+    __slots__ = ("_data",)
+
+    def __init__(self):
+        self._data = {}
+
+    def reset(self):
+        self._data = {}
+
+    def snapshot(self):
+        return self._data.copy()
+
+    def restore(self, snapshot):
+        self._data = dict(snapshot)
+
+
+_mock_db = MockStore()
+_mock_db_baseline = {}
+
+# Credential env vars that init() reads; cleared by the reset fixture.
+_WA_ENV_VARS = ("uid", "project_key", "environment_key", "LOGIN_TOKEN", "PROJECT_KEY", "ENVIRONMENT_KEY")
+
+# Captures the last send_email payload so tests can assert on cc/bcc handling.
+_captured_email_body = {}
+
+
+# ------------------ FAKE BACKEND ------------------
+# Faked at the HTTP boundary rather than at call_post_api/call_get_api, so the
+# SDK's real request helpers (JSON encoding, success-envelope parsing, error
+# messages) run in every test and the fakes cannot drift from their contract.
+
+class FakeResponse:
+    def __init__(self, payload, status_code=200):
+        self._payload = payload
+        self.status_code = status_code
+
+    def json(self):
+        return self._payload
+
+    @property
+    def content(self):
+        return _json.dumps(self._payload).encode("utf-8")
+
+
+def _ok(data=None, message="ok"):
+    return FakeResponse({"success": "1", "message": message, "data": data})
+
+
+def _fail(message, status_code=400):
+    return FakeResponse({"success": "0", "message": message}, status_code)
+
+
+class FakeBackend:
+    """Stands in for the shared requests.Session used by waveassist.utils."""
+
+    def post(self, url, json=None, data=None, files=None, headers=None, **kwargs):
+        path = url.split(API_BASE_URL, 1)[-1].strip("/")
+        if isinstance(data, bytes):  # call_post_api sends pre-encoded JSON
+            if (headers or {}).get("Content-Encoding") == "gzip":
+                data = gzip.decompress(data)
+            json, data = _json.loads(data), None
+        if json is not None:
+            # Same encoding requests applies to json=..., so non-JSON payloads fail here too.
+            json = _json.loads(_json.dumps(json, allow_nan=False))
+        if path == "data/set_data_for_key":
+            _mock_db._data[json["data_key"]] = {
+                "data": json["data"],
+                "data_type": json["data_type"],
+            }
+            for sidecar in ("dtypes", "encoding"):
+                if sidecar in json:
+                    _mock_db._data[json["data_key"]][sidecar] = json[sidecar]
+            return _ok()
+        if path == "sdk/send_email":
+            _captured_email_body.clear()
+            _captured_email_body.update(data or {})
+            return _ok()
+        return _fail("Invalid POST path", 404)
+
+    def get(self, url, params=None, headers=None, **kwargs):
+        path = url.split(API_BASE_URL, 1)[-1].strip("/")
+        if path == "data/fetch_data_for_key":
+            entry = _mock_db._data.get(params["data_key"])
+            if entry is None:
+                return _fail("Key not found", 404)
+            return _ok(dict(entry))
+        return _fail("Invalid GET path", 404)
+
+
+# ------------------ TEMPLATE MODELS ------------------
+# Response models for the JSON template tests. Templates only read model_fields,
+# so defer_build keeps pydantic from compiling a validator for any of them.
+
+_DEFERRED = ConfigDict(defer_build=True)
+
+
+class SimpleModel(BaseModel):
+    """Simple model with basic types."""
+    model_config = _DEFERRED
+    name: str
+    age: int
+    score: float
+    is_active: bool
+
+
+class ModelWithDescriptions(BaseModel):
+    """Model with field descriptions."""
+    model_config = _DEFERRED
+    title: str = Field(description="The title of the item")
+    count: int = Field(description="Number of items")
+    price: float = Field(description="Price in USD")
+
+
+class ModelWithOptionals(BaseModel):
+    """Model with optional fields."""
+    model_config = _DEFERRED
+    required_field: str
+    optional_string: Optional[str] = None
+    optional_int: Optional[int] = None
+    optional_with_default: str = "default_value"
+
+
+class ModelWithLists(BaseModel):
+    """Model with list fields."""
+    model_config = _DEFERRED
+    tags: List[str]
+    scores: List[int]
+    items: List[float]
+
+
+class Address(BaseModel):
+    """Nested model for address."""
+    model_config = _DEFERRED
+    street: str
+    city: str
+    zip_code: str = Field(description="Postal code")
+
+
+class Person(BaseModel):
+    """Model with nested Pydantic model."""
+    model_config = _DEFERRED
+    name: str
+    email: str
+    address: Address
+
+
+class OrderItem(BaseModel):
+    """Item in an order."""
+    model_config = _DEFERRED
+    product_name: str
+    quantity: int
+    unit_price: float
+
+
+class Order(BaseModel):
+    """Model with list of nested models."""
+    model_config = _DEFERRED
+    order_id: str
+    customer_name: str
+    items: List[OrderItem]
+    total: float
+
+
+class DeeplyNested(BaseModel):
+    """Deeply nested structure."""
+    model_config = _DEFERRED
+    level1_field: str
+    nested: Person  # Person contains Address
+
+
+class ComplexModel(BaseModel):
+    """Complex model with various field types."""
+    model_config = _DEFERRED
+    id: str = Field(description="Unique identifier")
+    name: str
+    tags: List[str] = Field(description="List of tags")
+    metadata: Optional[Dict[str, str]] = None
+    owner: Optional[Person] = None
+    items: List[OrderItem] = Field(description="Order items")
+
+
+class ModelWithLiteral(BaseModel):
+    """Model with Literal field (status) and description."""
+    model_config = _DEFERRED
+    status: Literal["ready", "clarify"] = Field(
+        description="ready when all data is collected; clarify when missing."
+    )
+    kind: Literal["input", "output"] = Field(description="Field kind")
+
+
+_TEMPLATE_MODELS = SimpleNamespace(
+    SimpleModel=SimpleModel,
+    ModelWithDescriptions=ModelWithDescriptions,
+    ModelWithOptionals=ModelWithOptionals,
+    ModelWithLists=ModelWithLists,
+    Address=Address,
+    Person=Person,
+    OrderItem=OrderItem,
+    Order=Order,
+    DeeplyNested=DeeplyNested,
+    ComplexModel=ComplexModel,
+    ModelWithLiteral=ModelWithLiteral,
+)
+
+
+# ------------------ FIXTURES ------------------
+
+@pytest.fixture(scope="session", autouse=True)
+def patched_waveassist():
+    """Route the SDK's HTTP calls to the fake backend once for the whole
+    session and record the mock DB's baseline state for clean_db to roll
+    back to.
+
+    Modules that need different backend behaviour (e.g. test_never_crash)
+    swap in their own call_*_api mocks per test and restore them afterwards.
+    """
+    real_session = waveassist.utils._SESSION
+    waveassist.utils._SESSION = FakeBackend()
+    global _mock_db_baseline
+    _mock_db_baseline = _mock_db.snapshot()
+    yield waveassist
+    waveassist.utils._SESSION = real_session
+
+
+@pytest.fixture
+def mock_db():
+    """The in-memory key/value store behind the mocked data endpoints."""
+    return _mock_db
+
+
+@pytest.fixture
+def captured_email_body():
+    """The body of the last mocked send_email request."""
+    return _captured_email_body
+
+
+@pytest.fixture(scope="session")
+def sample_df():
+    """A small DataFrame shared read-only across the session; do not mutate it."""
+    return pd.DataFrame({"name": ["Alice", "Bob"], "score": [95, 88]})
+
+
+@pytest.fixture
+def async_backend(monkeypatch):
+    """Point waveassist.aio's httpx client at the same fake backend (and mock DB)."""
+    httpx = pytest.importorskip("httpx")
+    from waveassist import aio
+
+    fake = FakeBackend()
+
+    def handler(request):
+        url = str(request.url.copy_with(query=None))
+        if request.method == "POST":
+            resp = fake.post(url, data=request.content or b"null", headers=request.headers)
+        else:
+            resp = fake.get(url, params=dict(request.url.params))
+        return httpx.Response(resp.status_code, json=resp.json())
+
+    monkeypatch.setattr(aio, "_new_client", lambda: httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    monkeypatch.setattr(aio, "_CLIENT", None)
+    return aio
+
+
+@pytest.fixture(scope="session")
+def template_models():
+    """The pydantic models used by the JSON template tests, by class name."""
+    return _TEMPLATE_MODELS
+
+
+@pytest.fixture(autouse=True)
+def clean_db():
+    """Roll the mock DB back to its baseline and clear the captured email and SDK caches before every test."""
+    _mock_db.restore(_mock_db_baseline)
+    _captured_email_body.clear()
+    waveassist.invalidate_cache()
+    waveassist._cached_client.cache_clear()
+    yield
+
+
+@pytest.fixture(scope="module")
+def initialized_client():
+    """Run init() once per module for tests that only need a configured SDK."""
+    init("test-token-dummy", "test-project-dummy")
+    yield waveassist
+
+
+@pytest.fixture
+def reset():
+    """Clear SDK config and credential env vars, for tests that probe init() itself."""
+    _config.LOGIN_TOKEN = None
+    _config.PROJECT_KEY = None
+    _config.ENVIRONMENT_KEY = None
+    _config.DEFAULT_ENVIRONMENT_KEY = None
+    _config.DEFAULT_PROJECT_KEY = None
+    _config.DEFAULT_LOGIN_TOKEN = None
+    _config.DEFAULT_RUN_ID = None
+    waveassist._load_env_once.cache_clear()
+    # Membership checks are plain dict lookups; only touch os.environ (which
+    # calls unsetenv) when a credential var is actually set.
+    if any(var in os.environ for var in _WA_ENV_VARS):
+        for var in _WA_ENV_VARS:
+            os.environ.pop(var, None)
+    yield
@@ -0,0 +1,7 @@
+"""Compatibility shim: `python tests/run_tests.py` runs the core suite under pytest."""
+import sys
+
+import pytest
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__.replace("run_tests", "test_core")]))
@@ -0,0 +1,80 @@
+"""
+Tests for the asyncio variants in waveassist.aio, run against the conftest fake backend.
+"""
+import asyncio
+from unittest import mock
+
+import pandas as pd
+import pytest
+from pydantic import BaseModel
+
+pytest.importorskip("httpx")
+
+import waveassist
+
+pytestmark = pytest.mark.usefixtures("initialized_client")
+
+
+def test_astore_then_afetch_roundtrip(async_backend, sample_df):
+    async def scenario():
+        assert await async_backend.astore_data("profile", {"name": "Alice"}) is True
+        assert await async_backend.astore_data("scores", sample_df) is True
+        return await async_backend.afetch_data("profile"), await async_backend.afetch_data("scores")
+
+    profile, scores = asyncio.run(scenario())
+    assert profile == {"name": "Alice"}
+    assert isinstance(scores, pd.DataFrame) and scores.equals(sample_df)
+
+
+def test_astore_drops_cached_fetch_value(async_backend):
+    waveassist.store_data("cfg", "old")
+    assert waveassist.fetch_data("cfg", cache_ttl=60) == "old"
+    assert asyncio.run(async_backend.astore_data("cfg", "new")) is True
+    assert waveassist.fetch_data("cfg", cache_ttl=60) == "new"
+
+
+def test_afetch_missing_key_returns_default(async_backend):
+    assert asyncio.run(async_backend.afetch_data("nope", default="fallback")) == "fallback"
+
+
+def test_sync_and_async_share_storage(async_backend):
+    waveassist.store_data("greeting", "hi")
+    assert asyncio.run(async_backend.afetch_data("greeting")) == "hi"
+
+
+def test_fetch_many_keeps_key_order_and_defaults(async_backend):
+    for i in range(5):
+        waveassist.store_data(f"k{i}", {"i": i})
+    keys = ["k3", "missing", "k0", "k4"]
+
+    result = asyncio.run(async_backend.fetch_many(keys, default=None, max_concurrency=2))
+
+    assert list(result) == keys
+    assert result == {"k3": {"i": 3}, "missing": None, "k0": {"i": 0}, "k4": {"i": 4}}
+
+
+def test_fetch_many_bounds_concurrency(async_backend, monkeypatch):
+    in_flight = peak = 0
+
+    async def fake_afetch(key, run_based=False, default=None):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return key
+
+    monkeypatch.setattr(async_backend, "afetch_data", fake_afetch)
+    result = asyncio.run(async_backend.fetch_many([str(i) for i in range(10)], max_concurrency=3))
+    assert peak == 3
+    assert list(result.values()) == [str(i) for i in range(10)]
+
+
+def test_acall_llm_delegates_to_call_llm(async_backend):
+    class Answer(BaseModel):
+        text: str
+
+    with mock.patch.object(async_backend, "call_llm", return_value=Answer(text="ok")) as call:
+        result = asyncio.run(async_backend.acall_llm("test/model", "hi", Answer, temperature=0))
+    assert result.text == "ok"
+    call.assert_called_once_with("test/model", "hi", Answer, should_retry=False, temperature=0)
@@ -0,0 +1,256 @@
+"""
+Tests for the CLI helpers in waveassist.core (bundle building for push/pull).
+"""
+import io
+import json
+import os
+import zipfile
+from types import SimpleNamespace
+
+import pytest
+
+from waveassist import core
+
+
+def _touch(root, *paths):
+    for rel in paths:
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(rel)
+
+
+def test_push_bundle_skips_ignored_dirs_and_env_files(tmp_path):
+    project = tmp_path / "project"
+    _touch(
+        project,
+        "config.yaml",
+        "sub/a.py",
+        ".gitignore",
+        ".github/workflows/ci.yml",
+        "secretenv/notes.txt",
+        # excluded:
+        ".env",
+        ".env.local",
+        ".envrc",
+        "x.env",
+        "deploy/prod.env",
+        ".waveassist-pull-1234/config.yaml",  # left by a killed pull
+        ".waveassist-bak-0badcafe-sub/a.py",
+        ".git/HEAD",
+        "sub/__pycache__/a.cpython-311.pyc",
+        ".venv/lib/site.py",
+        "node_modules/pkg/index.js",
+    )
+    (project / "linked").symlink_to(project / "sub", target_is_directory=True)  # not followed
+    bundle_path = tmp_path / "bundle.zip"
+
+    core._write_bundle(bundle_path, root=str(project))
+
+    with zipfile.ZipFile(bundle_path) as bundle:
+        assert sorted(bundle.namelist()) == [
+            ".github/workflows/ci.yml",
+            ".gitignore",
+            "config.yaml",
+            "secretenv/notes.txt",
+            "sub/a.py",
+        ]
+        assert all(info.compress_type == zipfile.ZIP_DEFLATED for info in bundle.infolist())
+        assert bundle.read("sub/a.py") == b"sub/a.py"
+
+
+class _BundleResponse:
+    """Stands in for the streamed pull_bundle response."""
+
+    status_code = 200
+    text = ""
+
+    def __init__(self, payload: bytes):
+        self._payload = payload
+
+    def iter_content(self, chunk_size=1):
+        for start in range(0, len(self._payload), chunk_size):
+            yield self._payload[start:start + chunk_size]
+
+
+def _zip_bytes(files: dict) -> bytes:
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as bundle:
+        for name, content in files.items():
+            bundle.writestr(name, content)
+    return buf.getvalue()
+
+
+@pytest.fixture
+def logged_in(tmp_path, monkeypatch):
+    config_path = tmp_path / "home" / "config.json"
+    config_path.parent.mkdir()
+    config_path.write_text(json.dumps({"uid": "tok"}))
+    monkeypatch.setattr(core, "CONFIG_PATH", config_path)
+    project = tmp_path / "project"
+    project.mkdir()
+    monkeypatch.chdir(project)
+    return project
+
+
+def test_pull_replaces_local_files_from_bundle(logged_in, monkeypatch):
+    project = logged_in
+    _touch(project, "main.py", "pkg/old.py", "keep.txt")
+    payload = _zip_bytes({"main.py": "new main", "pkg/new.py": "new module"})
+    monkeypatch.setattr(core, "_DOWNLOAD_CHUNK_BYTES", 16)  # exercise multi-chunk spooling
+    monkeypatch.setattr(core, "_session", lambda: SimpleNamespace(get=lambda *a, **k: _BundleResponse(payload)))
+
+    core.pull("proj", force=True)
+
+    assert (project / "main.py").read_text() == "new main"
+    assert (project / "pkg/new.py").read_text() == "new module"
+    assert not (project / "pkg/old.py").exists()  # top-level dirs are replaced wholesale
+    assert (project / "keep.txt").read_text() == "keep.txt"
+
+
+def test_pull_restores_local_files_when_swap_fails(logged_in, monkeypatch):
+    project = logged_in
+    _touch(project, "a.py", "b.py")
+    # Fails on the last of four moves, so at least one new file has been moved in by then
+    payload = _zip_bytes({"a.py": "new a", "b.py": "new b", "new1.py": "", "new2.py": ""})
+    monkeypatch.setattr(core, "_session", lambda: SimpleNamespace(get=lambda *a, **k: _BundleResponse(payload)))
+    real_replace = core.os.replace
+    moved = []
+
+    def flaky_replace(src, dst):
+        if ".waveassist-pull-" in str(src):
+            moved.append(src)
+            if len(moved) == 4:
+                raise OSError("disk full")
+        real_replace(src, dst)
+
+    monkeypatch.setattr(core.os, "replace", flaky_replace)
+
+    core.pull("proj", force=True)
+
+    assert (project / "a.py").read_text() == "a.py"
+    assert (project / "b.py").read_text() == "b.py"
+    assert sorted(p.name for p in project.iterdir()) == ["a.py", "b.py"]
+
+
+def test_login_polls_with_growing_delay_until_success(tmp_path, monkeypatch):
+    monkeypatch.setattr(core, "CONFIG_PATH", tmp_path / "config.json")
+    monkeypatch.setattr(core.webbrowser, "open", lambda url: None)
+    sleeps = []
+    monkeypatch.setattr(core.time, "sleep", sleeps.append)
+    replies = iter([{"success": "0"}] * 9 + [{"success": "1", "data": "tok"}])
+    response = lambda *a, **k: SimpleNamespace(status_code=200, json=lambda: next(replies))
+    monkeypatch.setattr(core, "_session", lambda: SimpleNamespace(get=response))
+
+    core.login()
+
+    assert json.loads((tmp_path / "config.json").read_text()) == {"uid": "tok"}
+    assert len(sleeps) == 9  # returns as soon as the login lands
+    assert sleeps[0] == core._LOGIN_POLL_FIRST_DELAY
+    assert sleeps == sorted(sleeps) and sleeps[-1] == core._LOGIN_POLL_MAX_DELAY
+
+
+def test_login_uid_is_read_once_and_refreshed_by_save_token(tmp_path, monkeypatch):
+    config_path = tmp_path / "config.json"
+    monkeypatch.setattr(core, "CONFIG_PATH", config_path)
+    core._load_uid.cache_clear()
+    assert core._load_uid(config_path) is None
+
+    core.save_token("tok-1")
+    assert core._load_uid(config_path) == "tok-1"
+    config_path.write_text(json.dumps({"uid": "edited"}))
+    assert core._load_uid(config_path) == "tok-1"  # cached
+    core.save_token("tok-2")
+    assert core._load_uid(config_path) == "tok-2"
+
+
+def test_push_uploads_bundle_without_leaving_temp_files(logged_in, tmp_path, monkeypatch):
+    project = logged_in
+    _touch(project, "config.yaml", "main.py")
+    scratch = tmp_path / "scratch"
+    scratch.mkdir()
+    monkeypatch.setattr(core.tempfile, "tempdir", str(scratch))
+    uploads = []
+
+    def post(url, headers=None, data=None, files=None, **kwargs):
+        if files is None:  # streamed through requests-toolbelt
+            body = data.to_string()
+            uploads.append(body[body.index(b"PK\x03\x04"):body.rindex(b"\r\n--")])
+        else:
+            part = files["bundle"][1]
+            uploads.append(part if isinstance(part, bytes) else part.read())
+        assert headers["Authorization"] == "Bearer tok"
+        return SimpleNamespace(ok=True, status_code=200, text="")
+
+    monkeypatch.setattr(core, "_session", lambda: SimpleNamespace(post=post))
+
+    core.push("proj", force=True)
+
+    with zipfile.ZipFile(io.BytesIO(uploads[0])) as bundle:
+        assert sorted(bundle.namelist()) == ["config.yaml", "main.py"]
+    assert list(scratch.iterdir()) == []
+
+    # A bundle larger than the spool goes to a temp file, which is removed afterwards too
+    monkeypatch.setattr(core, "_PUSH_SPOOL_MAX_BYTES", 16)
+    core.push("proj", force=True)
+    assert uploads[1] == uploads[0]
+    assert list(scratch.iterdir()) == []
+
+
+class _RangedBundleServer:
+    """Serves a bundle honouring Range headers; the first request for `flaky_from` dies mid-stream."""
+
+    def __init__(self, payload: bytes, flaky_from: int):
+        self.payload = payload
+        self.flaky_from = flaky_from
+        self.ranges = []
+        self.timeouts = []
+        self.closed = 0
+
+    def get(self, url, headers=None, timeout=None, **kwargs):
+        server = self
+        self.timeouts.append(timeout)
+        first, last = (int(n) for n in headers["Range"][len("bytes="):].split("-"))
+        last = min(last, len(self.payload) - 1)
+        self.ranges.append((first, last))
+        body = self.payload[first:last + 1]
+        flaky = first == self.flaky_from and self.ranges.count((first, last)) == 1
+        payload = self.payload
+
+        class _Partial:
+            status_code = 206
+            text = ""
+            headers = {"Content-Range": f"bytes {first}-{last}/{len(payload)}"}
+
+            def iter_content(self, chunk_size=1):
+                for start in range(0, len(body), chunk_size):
+                    if flaky and start:
+                        raise ConnectionError("connection reset")
+                    yield body[start:start + chunk_size]
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                server.closed += 1
+
+        return _Partial()
+
+
+def test_pull_downloads_large_bundle_in_parallel_ranges(logged_in, monkeypatch):
+    project = logged_in
+    files = {f"f{i}.txt": os.urandom(300).hex() for i in range(8)}
+    payload = _zip_bytes(files)
+    server = _RangedBundleServer(payload, flaky_from=512)
+    monkeypatch.setattr(core, "_RANGE_FIRST_BYTES", 512)
+    monkeypatch.setattr(core, "_DOWNLOAD_CHUNK_BYTES", 64)
+    monkeypatch.setattr(core.time, "sleep", lambda s: None)
+    monkeypatch.setattr(core, "_session", lambda: server)
+
+    core.pull("proj", force=True)
+
+    for name, content in files.items():
+        assert (project / name).read_text() == content
+    assert server.ranges[0] == (0, 511)
+    assert len({first for first, _ in server.ranges[1:]}) == core._RANGE_PARTS + 1  # 4 parts + 1 resume
+    assert all(server.timeouts)  # a stalled part can't hang pull
+    assert server.closed == len(server.ranges) - 1  # every range response, failed one included
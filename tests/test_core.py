@@ -1,142 +1,139 @@
-import sys
+import json
 import os
 import pandas as pd
-from pathlib import Path
-from dotenv import load_dotenv
+import pytest
 
-# Add the parent directory to sys.path so we can import waveassist
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from waveassist import store_data, fetch_data, send_email
 
-from waveassist import init, store_data, fetch_data, set_worker_defaults, send_email
-from waveassist import _config
-
-# Dummy in-memory store
-mock_db = {}
-
-# ------------------ MOCKING ------------------
-
-def mock_call_post_api(path, payload):
-    if path == 'data/set_data_for_key/':
-        key = payload['data_key']
-        mock_db[key] = {
-            "data": payload["data"],
-            "data_type": payload["data_type"]
-        }
-        return True, {"message": "ok"}
-    return False, {"error": "Invalid POST path"}
-
-def mock_call_get_api(path, params):
-    if path == 'data/fetch_data_for_key/':
-        key = params['data_key']
-        if key in mock_db:
-            return True, {
-                "data": mock_db[key]["data"],
-                "data_type": mock_db[key]["data_type"]
-            }
-        return False, {"error": "Key not found"}
-    return False, {"error": "Invalid GET path"}
-
-
-# Captures the last send_email payload so tests can assert on cc/bcc handling.
-captured_email_body = {}
-
-
-def mock_call_post_api_with_files(path, body, files=None):
-    if path == "sdk/send_email/":
-        captured_email_body.clear()
-        captured_email_body.update(body)
-        return True, {"success": "1", "message": "ok"}
-    return False, "Invalid path"
-
-
-# Patch into waveassist module
 import waveassist
-waveassist.call_post_api = mock_call_post_api
-waveassist.call_get_api = mock_call_get_api
-waveassist.call_post_api_with_files = mock_call_post_api_with_files
-
-# ------------------ CREDENTIAL HELPERS ------------------
-
-def get_test_credentials():
-    """Get test credentials from environment, .env file, or use dummy values for mocked tests."""
-    # Try loading .env file first
-    env_path = Path(".env")
-    if env_path.exists():
-        load_dotenv(dotenv_path=env_path, override=False)
-    
-    token = os.getenv("uid") or os.getenv("LOGIN_TOKEN")
-    project_key = os.getenv("project_key") or os.getenv("PROJECT_KEY")
-    environment_key = os.getenv("environment_key") or os.getenv("ENVIRONMENT_KEY")
-    
-    # If still not found, check if we're in interactive mode
-    if not token or not project_key:
-        import sys
-        is_interactive = sys.stdin.isatty()
-        
-        if is_interactive:
-            # Prompt for missing credentials
-            if not token:
-                token = input("Enter LOGIN_TOKEN (uid): ").strip()
-            if not project_key:
-                project_key = input("Enter PROJECT_KEY: ").strip()
-        else:
-            # Non-interactive: use dummy values for mocked tests
-            # Since API calls are mocked, these values don't need to be real
-            token = token or "test-token-dummy"
-            project_key = project_key or "test-project-dummy"
-    
-    return token, project_key, environment_key
-
-# ------------------ RESET FUNCTION ------------------
-
-def reset_state():
-    _config.LOGIN_TOKEN = None
-    _config.PROJECT_KEY = None
-    _config.ENVIRONMENT_KEY = None
-    _config.DEFAULT_ENVIRONMENT_KEY = None
-    _config.DEFAULT_PROJECT_KEY = None
-    _config.DEFAULT_LOGIN_TOKEN = None
-    _config.DEFAULT_RUN_ID = None
-    mock_db.clear()
-    for var in ["uid", "project_key", "environment_key", "LOGIN_TOKEN", "PROJECT_KEY", "ENVIRONMENT_KEY"]:
-        os.environ.pop(var, None)
+
+# Every test here shares one init() per module; see conftest.initialized_client.
+pytestmark = pytest.mark.usefixtures("initialized_client")
 
 # ------------------ TEST CASES ------------------
 
 def test_store_and_fetch_string():
-    reset_state()
-    token, project_key, _ = get_test_credentials()
-    init(token, project_key)
     store_data("greeting", "Hello, WaveAssist!")
     result = fetch_data("greeting")
     assert result == "Hello, WaveAssist!"
-    print("✅ test_store_and_fetch_string passed")
 
 def test_store_and_fetch_json():
-    reset_state()
-    token, project_key, _ = get_test_credentials()
-    init(token, project_key)
     data = {"name": "Alice", "score": 95}
     store_data("user_profile", data)
     result = fetch_data("user_profile")
     assert result == data
-    print("✅ test_store_and_fetch_json passed")
-
-def test_store_and_fetch_dataframe():
-    reset_state()
-    token, project_key, _ = get_test_credentials()
-    init(token, project_key)
-    df = pd.DataFrame({"name": ["Alice", "Bob"], "score": [95, 88]})
-    store_data("user_scores", df)
+
+def test_store_and_fetch_dataframe(sample_df):
+    store_data("user_scores", sample_df)
     result = fetch_data("user_scores")
-    pd.testing.assert_frame_equal(result, df)
-    print("✅ test_store_and_fetch_dataframe passed")
+    if os.getenv("WA_STRICT_ASSERT"):
+        # Rich per-column diff, for debugging a failing round-trip
+        pd.testing.assert_frame_equal(result, sample_df)
+    assert result.equals(sample_df)
+    assert list(result.columns) == list(sample_df.columns)
+    assert result.dtypes.equals(sample_df.dtypes)
+
+
+def test_dataframe_dtypes_survive_round_trip():
+    """The stored dtypes sidecar restores what record inference would lose."""
+    df = pd.DataFrame({
+        "f": [1.5, float("nan"), 2.0],
+        "when": pd.to_datetime(["2024-01-01", "2024-02-01", None]),
+        "when_tz": pd.to_datetime(["2024-01-01 10:00", "2024-02-01 00:00", None]).tz_localize("Europe/Paris"),
+        "cat": pd.Categorical(["x", "y", "x"]),
+        "f32": pd.Series([1, 2, 3], dtype="float32"),
+        "i32": pd.Series([1, 2, 3], dtype="int32"),
+    })
+    store_data("typed_df", df)
+    pd.testing.assert_frame_equal(fetch_data("typed_df"), df)
+
+
+def test_string_dtypes_survive_round_trip(mock_db):
+    """"string" reads back as StringDtype and "str" keeps missing values missing, on any pandas."""
+    df = pd.DataFrame({"s": ["a", None], "t": pd.Series(["b", None], dtype="string")})
+    store_data("strings_df", df)
+    mock_db._data["strings_df"]["dtypes"]["s"] = "str"  # as written by pandas >= 3
+    result = fetch_data("strings_df")
+
+    assert result["t"].dtype == pd.StringDtype()
+    assert result["t"].tolist() == ["b", pd.NA]
+    assert result["s"].iloc[0] == "a" and pd.isna(result["s"].iloc[1])
+    assert str(result["s"].dtype) in ("str", "object")
+
+
+@pytest.mark.parametrize("data_format", ["arrow", "parquet"])
+def test_dataframe_columnar_format_round_trip(mock_db, data_format):
+    pytest.importorskip("pyarrow")
+    df = pd.DataFrame({
+        "i": [1, 2, 3],
+        "f": [1.5, float("nan"), 2.0],
+        "when": pd.to_datetime(["2024-01-01", None, "2024-03-01"]),
+        "s": ["a", None, "c"],
+    })
+    assert store_data("columnar_df", df, data_format=data_format)
+    assert mock_db._data["columnar_df"]["encoding"] == data_format
+    assert isinstance(mock_db._data["columnar_df"]["data"], str)
+    pd.testing.assert_frame_equal(fetch_data("columnar_df"), df)
+
+
+@pytest.mark.parametrize("data_format", ["arrow", "parquet"])
+def test_dataframe_columnar_format_falls_back_to_records(mock_db, monkeypatch, data_format):
+    import sys
+
+    monkeypatch.setitem(sys.modules, "pyarrow", None)  # import fails like an uninstalled package
+    df = pd.DataFrame({"i": [1, 2]})
+    assert store_data("arrow_fallback", df, data_format=data_format)
+    assert "encoding" not in mock_db._data["arrow_fallback"]
+    assert mock_db._data["arrow_fallback"]["data"] == [{"i": 1}, {"i": 2}]
+
+
+def test_store_data_rejects_unknown_data_format():
+    with pytest.raises(ValueError, match="data_format"):
+        store_data("bad_format", pd.DataFrame({"i": [1]}), data_format="xml")
+
+
+@pytest.mark.parametrize(
+    "frame",
+    [
+        pd.DataFrame({
+            "i": [1, 2, 3],
+            "f": [0.125, float("nan"), float("inf")],
+            "s": ["a", None, "c"],
+            "b": [True, False, True],
+            "when": pd.to_datetime(["2024-01-01 10:00:00.123456", None, "2024-03-01 00:00:00.000000"]),
+            "when_tz": pd.to_datetime(["2024-01-01 10:00", None, "2024-03-01 00:00"]).tz_localize("Europe/Berlin"),
+            5: [1, 2, 3],
+        }),
+        pd.DataFrame({
+            "i": pd.array([1, None, 3], dtype="Int64"),
+            "u": pd.array([None, 2, 3], dtype="UInt8"),
+            "b": pd.array([True, None, False], dtype="boolean"),
+            "f": pd.array([1.5, None, float("inf")], dtype="Float64"),
+        }),
+        # pandas-encoded fallbacks
+        pd.DataFrame({"cat": pd.Categorical(["x", None]), "td": pd.to_timedelta([1, None], unit="h")}),
+        pd.DataFrame({"mixed": ["x", 1]}),
+        pd.DataFrame(),
+    ],
+    ids=["common-dtypes", "nullable-dtypes", "fallback-dtypes", "mixed-object", "empty"],
+)
+def test_df_to_records_matches_to_json_roundtrip(frame):
+    """The direct conversion yields exactly what the old to_json -> json.loads path stored."""
+    expected = json.loads(frame.to_json(orient="records", date_format="iso"))
+    assert waveassist._df_to_records(frame) == expected
+
+
+def test_store_records_as_dataframe_sends_null_not_nan(mock_db):
+    """Ragged records stored as a dataframe go over the wire as JSON null, not NaN."""
+    records = [{"a": 1.5, "when": pd.Timestamp("2024-01-01")}, {"b": 2}]
+    assert store_data("ragged", records, data_type="dataframe")
+    assert mock_db._data["ragged"]["data"] == [
+        {"a": 1.5, "when": "2024-01-01T00:00:00.000", "b": None},
+        {"a": None, "when": None, "b": 2.0},
+    ]
 
 
 def test_store_with_explicit_data_type():
-    reset_state()
-    token, project_key, _ = get_test_credentials()
-    init(token, project_key)
     # Store dict as string explicitly
     store_data("as_string", {"a": 1}, data_type="string")
     result = fetch_data("as_string")
@@ -147,114 +144,42 @@ def test_store_with_explicit_data_type():
     result = fetch_data("as_json")
     assert isinstance(result, dict)
     assert result.get("value") == "hello"
-    print("✅ test_store_with_explicit_data_type passed")
 
 def test_fetch_missing_key_returns_default():
-    reset_state()
-    token, project_key, _ = get_test_credentials()
-    init(token, project_key)
     result = fetch_data("nonexistent_key", default="my_default")
     assert result == "my_default"
     result_df = fetch_data("nonexistent_key", default=pd.DataFrame())
     assert isinstance(result_df, pd.DataFrame)
     assert result_df.empty
-    print("✅ test_fetch_missing_key_returns_default passed")
-
-
-def test_fetch_without_init_raises():
-    reset_state()
-    try:
-        fetch_data("some_key")
-        assert False, "Expected an exception when init was not called"
-    except Exception as e:
-        assert "not initialized" in str(e).lower()
-        print("✅ test_fetch_without_init_raises passed")
-
-
-# ------------------ SEND EMAIL TESTS ------------------
 
 def test_send_email_success():
-    reset_state()
-    token, project_key, _ = get_test_credentials()
-    init(token, project_key)
     ok = send_email("Test subject", "<p>Hello</p>")
     assert ok is True
-    print("✅ test_send_email_success passed")
-
-
-def test_send_email_empty_subject_raises_by_default():
-    reset_state()
-    token, project_key, _ = get_test_credentials()
-    init(token, project_key)
-    for bad_subject in ("", "   "):
-        try:
-            send_email(bad_subject, "<p>Body</p>")
-            assert False, "Expected ValueError"
-        except ValueError as e:
-            assert "Subject" in str(e) or "empty" in str(e).lower()
-    # With raise_on_failure=False, returns False
-    assert send_email("", "<p>Body</p>", raise_on_failure=False) is False
-    print("✅ test_send_email_empty_subject_raises_by_default passed")
-
-
-def test_send_email_empty_html_raises_by_default():
-    reset_state()
-    token, project_key, _ = get_test_credentials()
-    init(token, project_key)
-    for bad_html in ("", "   "):
-        try:
-            send_email("Subject", bad_html)
-            assert False, "Expected ValueError"
-        except ValueError as e:
-            assert "HTML" in str(e) or "empty" in str(e).lower()
-    assert send_email("Subject", "", raise_on_failure=False) is False
-    print("✅ test_send_email_empty_html_raises_by_default passed")
-
-
-def test_send_email_raise_on_failure_validation_raises():
-    reset_state()
-    token, project_key, _ = get_test_credentials()
-    init(token, project_key)
-    try:
-        send_email("", "<p>Body</p>")
-        assert False, "Expected ValueError"
-    except ValueError as e:
-        assert "Subject" in str(e) or "empty" in str(e).lower()
-    try:
-        send_email("Sub", "")
-        assert False, "Expected ValueError"
-    except ValueError as e:
-        assert "HTML" in str(e) or "empty" in str(e).lower()
-    print("✅ test_send_email_raise_on_failure_validation_raises passed")
-
-
-def test_send_email_without_init_raises():
-    reset_state()
-    try:
-        send_email("Sub", "<p>Hi</p>")
-        assert False, "Expected an exception when init was not called"
-    except Exception as e:
-        assert "not initialized" in str(e).lower()
-    print("✅ test_send_email_without_init_raises passed")
+
+
+@pytest.mark.parametrize(
+    "subject, html, err_key",
+    [
+        ("", "<p>Body</p>", "Subject"),
+        ("   ", "<p>Body</p>", "Subject"),
+        ("Sub", "", "HTML"),
+        ("Sub", "   ", "HTML"),
+    ],
+)
+def test_send_email_validation(subject, html, err_key):
+    """Blank subject/html raises ValueError by default and returns False with raise_on_failure=False."""
+    with pytest.raises(ValueError, match=err_key):
+        send_email(subject, html)
+    assert send_email(subject, html, raise_on_failure=False) is False
 
 
 def test_send_email_invalid_attachment_raises_by_default():
-    reset_state()
-    token, project_key, _ = get_test_credentials()
-    init(token, project_key)
-    try:
+    with pytest.raises(ValueError, match="(?i)read|attachment"):
         send_email("Sub", "<p>Hi</p>", attachment_file=object())
-        assert False, "Expected ValueError"
-    except ValueError as e:
-        assert "read" in str(e).lower() or "attachment" in str(e).lower()
     assert send_email("Sub", "<p>Hi</p>", attachment_file=object(), raise_on_failure=False) is False
-    print("✅ test_send_email_invalid_attachment_raises_by_default passed")
 
 
 def test_send_email_valid_attachment_success():
-    reset_state()
-    token, project_key, _ = get_test_credentials()
-    init(token, project_key)
     # File-like with .read() and .name
     class FakeFile:
         name = "report.pdf"
@@ -262,16 +187,49 @@ def test_send_email_valid_attachment_success():
             return b"fake pdf"
     ok = send_email("Sub", "<p>Hi</p>", attachment_file=FakeFile())
     assert ok is True
-    print("✅ test_send_email_valid_attachment_success passed")
+
+
+def test_send_email_retry_resends_whole_attachment(monkeypatch):
+    """A failed first attempt consumed the file; the retry must send it from the start."""
+    import io
+
+    sent = []
+
+    def flaky_post(path, body, files=None):
+        sent.append(files["attachment"][1].read())
+        return (len(sent) > 1), "temporary failure"
+
+    monkeypatch.setattr(waveassist, "call_post_api_with_files", flaky_post)
+    monkeypatch.setattr(waveassist.time, "sleep", lambda s: None)
+    attachment = io.BytesIO(b"header" + b"report body")
+    attachment.read(6)  # caller already positioned the file
+    assert send_email("Sub", "<p>Hi</p>", attachment_file=attachment) is True
+    assert sent == [b"report body", b"report body"]
+
+
+def test_send_email_streams_attachment_with_toolbelt(monkeypatch):
+    pytest.importorskip("requests_toolbelt")
+    import io
+    import waveassist.utils as utils
+
+    captured = {}
+
+    class RecordingSession:
+        def post(self, url, data=None, headers=None, files=None, **kwargs):
+            captured.update(data=data, headers=headers, files=files)
+            return type("R", (), {"content": b'{"success": "1"}'})()
+
+    monkeypatch.setattr(utils, "_SESSION", RecordingSession())
+    assert send_email("Sub", "<p>Hi</p>", attachment_file=io.BytesIO(b"pdf bytes")) is True
+    assert captured["files"] is None
+    assert captured["headers"]["Content-Type"].startswith("multipart/form-data")
+    assert b"pdf bytes" in captured["data"].to_string()
 
 
 def test_call_llm_surfaces_real_error():
     """Regression: a failing LLM call must surface the underlying error message, not a
     TypeError from a broken except clause ('catching classes that do not inherit from
     BaseException' — the openai.Timeout-is-not-an-exception bug shipped in 0.8.2)."""
-    reset_state()
-    token, project_key, _ = get_test_credentials()
-    init(token, project_key)
     from unittest import mock
     from pydantic import BaseModel
 
@@ -281,168 +239,280 @@ def test_call_llm_surfaces_real_error():
     fake_client = mock.MagicMock()
     fake_client.chat.completions.create.side_effect = ConnectionError("the real error")
     with mock.patch.object(waveassist, "_resolve_llm_client", return_value=fake_client):
-        try:
+        # A TypeError from a broken except clause escapes pytest.raises and fails the test.
+        with pytest.raises(RuntimeError, match="the real error"):
             waveassist.call_llm(model="test/model", prompt="hi", response_model=TinyModel)
-            assert False, "should have raised"
-        except RuntimeError as e:
-            assert "the real error" in str(e), f"real error masked: {e}"
-        except TypeError as e:
-            assert False, f"broken except clause is back: {e}"
-    print("✅ test_call_llm_surfaces_real_error passed")
 
 
-def test_send_email_no_cc_omits_fields():
+def test_call_llm_exact_cache_skips_repeat_calls(tmp_path, monkeypatch):
+    from types import SimpleNamespace
+    from unittest import mock
+    from pydantic import BaseModel
+
+    class TinyModel(BaseModel):
+        answer: str
+
+    monkeypatch.setenv("WAVEASSIST_LLM_CACHE_PATH", str(tmp_path / "llm_cache.db"))
+    fake_client = mock.MagicMock()
+    fake_client.chat.completions.create.return_value = SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content='{"answer": "42"}'))]
+    )
+    with mock.patch.object(waveassist, "_resolve_llm_client", return_value=fake_client), \
+            mock.patch.object(waveassist, "_resolve_model_entry", return_value=None), \
+            mock.patch.object(waveassist, "_resolve_llm_provider", return_value="openrouter"):
+        call = lambda prompt, **kw: waveassist.call_llm("test/model", prompt, TinyModel, cache="exact", **kw)
+        assert call("q").answer == "42"
+        assert call("q").answer == "42"
+        assert fake_client.chat.completions.create.call_count == 1
+        # A different prompt or kwargs is a different entry; cache=None always calls out.
+        call("other")
+        call("q", temperature=0)
+        waveassist.call_llm("test/model", "q", TinyModel)
+        assert fake_client.chat.completions.create.call_count == 4
+
+    with pytest.raises(ValueError, match="cache mode"):
+        waveassist.call_llm("test/model", "q", TinyModel, cache="semantic")
+
+
+def test_llm_cache_write_prunes_expired_rows(tmp_path, monkeypatch):
+    from waveassist import _llm_cache
+    from waveassist.constants import LLM_RESPONSE_CACHE_TTL
+
+    monkeypatch.setenv("WAVEASSIST_LLM_CACHE_PATH", str(tmp_path / "llm_cache.db"))
+    now = 1_000_000_000.0
+    monkeypatch.setattr(_llm_cache.time, "time", lambda: now)
+    _llm_cache.put("old", "{}")
+    now += LLM_RESPONSE_CACHE_TTL / 2
+    _llm_cache.put("recent", "{}")
+    now += LLM_RESPONSE_CACHE_TTL / 2 + 1
+    _llm_cache.put("new", "{}", ttl=60)  # a short ttl still keeps rows within the default
+
+    with _llm_cache._lock:
+        rows = _llm_cache._connection().execute("SELECT key FROM llm_cache ORDER BY key").fetchall()
+    assert rows == [("new",), ("recent",)]
+
+
+def test_send_email_no_cc_omits_fields(captured_email_body):
     """Backward compat: when cc/bcc aren't passed, the payload carries no cc/bcc keys."""
-    reset_state()
-    token, project_key, _ = get_test_credentials()
-    init(token, project_key)
     assert send_email("Sub", "<p>Hi</p>") is True
     assert "cc" not in captured_email_body
     assert "bcc" not in captured_email_body
-    print("✅ test_send_email_no_cc_omits_fields passed")
 
 
-def test_send_email_cc_list_joined():
-    reset_state()
-    token, project_key, _ = get_test_credentials()
-    init(token, project_key)
+def test_send_email_cc_list_joined(captured_email_body):
     assert send_email("Sub", "<p>Hi</p>", cc=["a@x.com", "b@y.com"]) is True
     assert captured_email_body["cc"] == "a@x.com,b@y.com"
-    print("✅ test_send_email_cc_list_joined passed")
 
 
-def test_send_email_cc_string_normalized():
-    reset_state()
-    token, project_key, _ = get_test_credentials()
-    init(token, project_key)
+def test_send_email_cc_string_normalized(captured_email_body):
     assert send_email("Sub", "<p>Hi</p>", cc="a@x.com") is True
     assert captured_email_body["cc"] == "a@x.com"
-    print("✅ test_send_email_cc_string_normalized passed")
 
 
-def test_send_email_bcc_list_joined():
-    reset_state()
-    token, project_key, _ = get_test_credentials()
-    init(token, project_key)
+def test_send_email_bcc_list_joined(captured_email_body):
     assert send_email("Sub", "<p>Hi</p>", bcc=["x@x.com", "y@y.com"]) is True
     assert captured_email_body["bcc"] == "x@x.com,y@y.com"
-    print("✅ test_send_email_bcc_list_joined passed")
 
 
-def test_send_email_cc_dedupes_and_drops_blanks():
-    reset_state()
-    token, project_key, _ = get_test_credentials()
-    init(token, project_key)
+def test_send_email_cc_dedupes_and_drops_blanks(captured_email_body):
     assert send_email("Sub", "<p>Hi</p>", cc=["a@x.com", " a@x.com ", "", None, "b@y.com"]) is True
     assert captured_email_body["cc"] == "a@x.com,b@y.com"
-    print("✅ test_send_email_cc_dedupes_and_drops_blanks passed")
 
 
-def test_send_email_empty_cc_omits_field():
+def test_send_email_empty_cc_omits_field(captured_email_body):
     """An all-blank cc collapses to nothing and is omitted, not sent as an empty string."""
-    reset_state()
-    token, project_key, _ = get_test_credentials()
-    init(token, project_key)
     assert send_email("Sub", "<p>Hi</p>", cc=["", "  ", None]) is True
     assert "cc" not in captured_email_body
-    print("✅ test_send_email_empty_cc_omits_field passed")
-
-
-def test_default_environment_key_used():
-    reset_state()
-    token, project_key, _ = get_test_credentials()
-    test_env_key = "test_default_env_key"
-    set_worker_defaults(environment_key=test_env_key)
-    init(token, project_key)  # No env key passed
-    assert _config.ENVIRONMENT_KEY == test_env_key
-    print("✅ test_default_environment_key_used passed")
-
-def test_env_fallbacks():
-    reset_state()
-    token, project_key, env_key = get_test_credentials()
-    # Use provided credentials as fallbacks
-    set_worker_defaults(token=token, project_key=project_key, environment_key=env_key or f"{project_key}_default")
-    init()  # Use fallback resolution
-    assert _config.LOGIN_TOKEN == token
-    assert _config.PROJECT_KEY == project_key
-    assert _config.ENVIRONMENT_KEY is not None  # Should be set (either from fallback or auto-generated)
-    print("✅ test_env_fallbacks passed")
-
-def test_init_from_dotenv():
-    reset_state()
-    
-    # Get credentials for the test .env file
-    token, project_key, env_key = get_test_credentials()
-    env_key = env_key or f"{project_key}_default"
-
-    # Create a temporary .env file
-    env_path = Path(".env")
-    env_content = f"""uid='{token}'
-project_key='{project_key}'
-environment_key='{env_key}'
-"""
-    env_path.write_text(env_content)
-
-    # Load .env explicitly
-    load_dotenv(dotenv_path=env_path, override=True)
-
-    # Should use .env values
-    init()
-
-    # Assert that values are set (not specific values)
-    assert _config.LOGIN_TOKEN is not None
-    assert _config.PROJECT_KEY is not None
-    assert _config.ENVIRONMENT_KEY is not None
-    assert _config.LOGIN_TOKEN == token
-    assert _config.PROJECT_KEY == project_key
-    assert _config.ENVIRONMENT_KEY == env_key
-    print("✅ test_init_from_dotenv passed")
-
-    # Clean up
-    env_path.unlink(missing_ok=True)
-
-# ------------------ RUN ALL ------------------
-
-if __name__ == "__main__":
-    # Check if we'll be using dummy credentials
-    env_path = Path(".env")
-    if env_path.exists():
-        load_dotenv(dotenv_path=env_path, override=False)
-    
-    token_available = bool(os.getenv("uid") or os.getenv("LOGIN_TOKEN"))
-    project_key_available = bool(os.getenv("project_key") or os.getenv("PROJECT_KEY"))
-    
-    import sys
-    is_interactive = sys.stdin.isatty()
-    will_use_dummy = not (token_available and project_key_available) and not is_interactive
-    
-    if will_use_dummy:
-        print("⚠️  Running tests with DUMMY credentials (API calls are mocked)")
-        print("   Set uid/LOGIN_TOKEN and project_key/PROJECT_KEY env vars to use real credentials\n")
+
+
+@pytest.mark.parametrize("available", [True, False])
+def test_check_credits_is_one_backend_round_trip(monkeypatch, available):
+    """Balance lookup, failure counting and the notification email all happen server-side."""
+    calls = []
+
+    def fake_post(path, body):
+        calls.append(path)
+        return True, {"data": {"credits_available": available, "credits_remaining": 1.5}}
+
+    def unexpected(*args, **kwargs):
+        raise AssertionError("check_credits_and_notify must not make extra backend calls")
+
+    monkeypatch.setattr(waveassist, "call_post_api", fake_post)
+    for name in ("call_get_api", "call_post_api_with_files", "store_data", "fetch_data", "send_email"):
+        monkeypatch.setattr(waveassist, name, unexpected)
+
+    assert waveassist.check_credits_and_notify(2.0, "bot") is available
+    assert calls == ["sdk/check_account_credits/"]
+
+
+@pytest.mark.parametrize("encoding", ["", "gzip"])
+def test_large_store_payload_compression_is_opt_in(monkeypatch, encoding):
+    import gzip
+    import waveassist.utils as utils
+
+    monkeypatch.setattr(utils, "HTTP_REQUEST_ENCODING", encoding)
+    body = {"rows": [{"i": i, "name": "x" * 20} for i in range(2000)]}
+    data, headers = utils._json_request(body)
+    if encoding:
+        assert headers["Content-Encoding"] == "gzip"
+        assert json.loads(gzip.decompress(data)) == body
+    else:
+        assert "Content-Encoding" not in headers
+        assert json.loads(data) == body
+    # Small bodies are never compressed
+    assert "Content-Encoding" not in utils._json_request({"a": 1})[1]
+
+    assert store_data("big_rows", body)
+    assert fetch_data("big_rows") == body
+
+
+def test_uploads_have_no_read_timeout(monkeypatch):
+    """Large store_data bodies and email attachments aren't cut off by the 30s read timeout."""
+    import io
+    import waveassist.utils as utils
+    from waveassist.constants import HTTP_TIMEOUT
+
+    timeouts = []
+    real_post = utils._SESSION.post
+
+    def recording_post(url, timeout=None, **kwargs):
+        timeouts.append(timeout)
+        return real_post(url, **kwargs)
+
+    monkeypatch.setattr(utils._SESSION, "post", recording_post)
+    monkeypatch.setattr(utils, "MultipartEncoder", None)  # the fake backend reads plain form data
+    assert store_data("small", {"a": 1})
+    assert store_data("big", {"rows": ["x" * 100] * 1000})
+    assert send_email("Sub", "<p>Hi</p>", attachment_file=io.BytesIO(b"pdf"))
+    assert timeouts == [HTTP_TIMEOUT, (HTTP_TIMEOUT[0], None), (HTTP_TIMEOUT[0], None)]
+
+
+def test_backoff_is_exponential_with_jitter():
+    from waveassist.utils import _backoff
+
+    for attempt in range(4):
+        delays = {_backoff(attempt) for _ in range(50)}
+        assert all(0.5 * 2 ** attempt <= d <= 1.5 * 2 ** attempt for d in delays)
+        assert len(delays) > 1  # jittered, not a fixed wall-clock step
+
+
+def test_http_session_never_replays_posts():
+    """Status retries apply to idempotent GETs only; a POST (e.g. send_email) is sent once."""
+    from waveassist.utils import _build_session
+
+    retry = _build_session().get_adapter("https://api.waveassist.io").max_retries
+    assert retry.is_retry("GET", 503)
+    assert not retry.is_retry("POST", 503)
+
+
+@pytest.mark.parametrize("encoder", ["orjson", "json"])
+def test_store_json_encodes_the_same_with_or_without_orjson(mock_db, monkeypatch, encoder):
+    """numpy values, datetimes and NaN store as the same JSON whichever encoder is installed."""
+    import datetime as dt
+    import numpy as np
+    import waveassist.utils as utils
+
+    if encoder == "orjson":
+        pytest.importorskip("orjson")
     else:
-        print("✅ Running tests with credentials from environment/.env file\n")
-    
-    test_store_and_fetch_string()
-    test_store_and_fetch_json()
-    test_store_and_fetch_dataframe()
-    test_fetch_missing_key_returns_default()
-    test_store_with_explicit_data_type()
-    test_fetch_without_init_raises()
-    test_send_email_success()
-    test_send_email_empty_subject_raises_by_default()
-    test_send_email_empty_html_raises_by_default()
-    test_send_email_raise_on_failure_validation_raises()
-    test_send_email_without_init_raises()
-    test_send_email_invalid_attachment_raises_by_default()
-    test_send_email_valid_attachment_success()
-    test_call_llm_surfaces_real_error()
-    test_send_email_no_cc_omits_fields()
-    test_send_email_cc_list_joined()
-    test_send_email_cc_string_normalized()
-    test_send_email_bcc_list_joined()
-    test_send_email_cc_dedupes_and_drops_blanks()
-    test_send_email_empty_cc_omits_field()
-    test_default_environment_key_used()
-    test_env_fallbacks()
-    test_init_from_dotenv()
-    print("\n🎉 All tests passed.")
+        monkeypatch.setattr(utils, "orjson", None)
+    payload = {
+        "n": np.int64(3),
+        "xs": np.array([1.5, np.nan]),
+        "missing": float("nan"),
+        "when": dt.datetime(2024, 1, 2, 3, 4, 5),
+        "day": dt.date(2024, 1, 2),
+        1: "int key",
+    }
+
+    assert store_data("mixed_json", payload)
+    assert mock_db._data["mixed_json"]["data_type"] == "json"
+    assert fetch_data("mixed_json") == {
+        "n": 3,
+        "xs": [1.5, None],
+        "missing": None,
+        "when": "2024-01-02T03:04:05+00:00",
+        "day": "2024-01-02",
+        "1": "int key",
+    }
+
+
+def test_fetch_cache_ttl_skips_backend_until_invalidated(mock_db):
+    store_data("cached_cfg", {"v": 1})
+    assert fetch_data("cached_cfg", cache_ttl=60) == {"v": 1}
+
+    # Changed behind the SDK's back: the cached value is still served...
+    mock_db._data["cached_cfg"]["data"] = {"v": 2}
+    first = fetch_data("cached_cfg", cache_ttl=60)
+    assert first == {"v": 1}
+    first["v"] = "mutated"  # ...as a copy, so callers can't corrupt it
+    assert fetch_data("cached_cfg", cache_ttl=60) == {"v": 1}
+    # ...uncached reads go to the backend...
+    assert fetch_data("cached_cfg") == {"v": 2}
+    # ...and invalidate_cache() forces a refetch.
+    waveassist.invalidate_cache("cached_cfg")
+    assert fetch_data("cached_cfg", cache_ttl=60) == {"v": 2}
+
+
+def test_store_data_drops_cached_value():
+    store_data("cached_cfg", "old")
+    assert fetch_data("cached_cfg", cache_ttl=60) == "old"
+    store_data("cached_cfg", "new")
+    assert fetch_data("cached_cfg", cache_ttl=60) == "new"
+
+
+def test_fetch_cache_does_not_cache_misses(mock_db):
+    assert fetch_data("not_yet", default="d", cache_ttl=60) == "d"
+    mock_db._data["not_yet"] = {"data": "here", "data_type": "string"}
+    assert fetch_data("not_yet", cache_ttl=60) == "here"
+
+
+def test_httpx_backend_adapter_round_trips(monkeypatch):
+    httpx = pytest.importorskip("httpx")
+    import waveassist.utils as utils
+
+    seen = []
+
+    def handler(request):
+        seen.append(request)
+        if request.method == "POST":
+            return httpx.Response(200, json={"success": "1", "echo": json.loads(request.content)})
+        return httpx.Response(200, json={"success": "1", "data": dict(request.url.params)})
+
+    monkeypatch.setattr(utils, "_SESSION", utils._HttpxSession(transport=httpx.MockTransport(handler)))
+
+    ok, response = utils.call_post_api("data/set_data_for_key", {"k": [1, 2]})
+    assert ok and response["echo"] == {"k": [1, 2]}
+    assert seen[-1].headers["Content-Type"] == "application/json"
+
+    ok, data = utils.call_get_api("data/fetch_data_for_key", {"data_key": "k", "run_id": None})
+    assert ok and data == {"data_key": "k"}
+
+
+def test_store_data_many_stores_every_key_in_order(mock_db):
+    frame = pd.DataFrame({"i": [1, 2]})
+    items = {f"many_{i}": {"n": i} for i in range(12)}
+    items["many_df"] = frame
+    store_data("many_0", "old")
+    assert fetch_data("many_0", cache_ttl=60) == "old"
+
+    result = waveassist.store_data_many(items, max_workers=4)
+
+    assert list(result) == list(items) and all(result.values())
+    assert fetch_data("many_0", cache_ttl=60) == {"n": 0}  # cached value dropped
+    assert fetch_data("many_11") == {"n": 11}
+    pd.testing.assert_frame_equal(fetch_data("many_df"), frame)
+    assert waveassist.store_data_many({}) == {}
+
+
+def test_store_data_many_validates_before_sending(mock_db):
+    with pytest.raises(ValueError, match="data_format"):
+        waveassist.store_data_many({"ok": pd.DataFrame({"i": [1]})}, data_format="xml")
+    assert "ok" not in mock_db._data
+
+
+def test_store_bytes_as_decoded_text():
+    assert store_data("raw_log", "naïve log line".encode("utf-8"))
+    assert fetch_data("raw_log") == "naïve log line"
+    assert store_data("raw_bad", b"ok \xff", data_type="string")
+    assert fetch_data("raw_bad") == "ok \ufffd"
@@ -0,0 +1,190 @@
+"""
+Tests for init() credential resolution and the "not initialized" guards.
+
+These need a fresh _config per test, so they live apart from test_core's
+module-scoped initialized client.
+"""
+import sys
+import os
+import pytest
+from functools import lru_cache
+from pathlib import Path
+from unittest import mock
+from dotenv import load_dotenv
+
+from waveassist import init, init_from_config, fetch_data, set_worker_defaults, send_email
+import waveassist
+from waveassist import _config
+
+pytestmark = pytest.mark.usefixtures("reset")
+
+# ------------------ CREDENTIAL HELPERS ------------------
+
+@lru_cache(maxsize=1)
+def get_test_credentials():
+    """Get test credentials from environment, .env file, or use dummy values for mocked tests.
+
+    Cached, so .env is parsed and the env chain resolved once per session.
+    """
+    # Try loading .env file first
+    env_path = Path(".env")
+    if env_path.exists():
+        load_dotenv(dotenv_path=env_path, override=False)
+    
+    token = os.getenv("uid") or os.getenv("LOGIN_TOKEN")
+    project_key = os.getenv("project_key") or os.getenv("PROJECT_KEY")
+    environment_key = os.getenv("environment_key") or os.getenv("ENVIRONMENT_KEY")
+    
+    # If still not found, check if we're in interactive mode
+    if not token or not project_key:
+        import sys
+        is_interactive = sys.stdin.isatty()
+        
+        if is_interactive:
+            # Prompt for missing credentials
+            if not token:
+                token = input("Enter LOGIN_TOKEN (uid): ").strip()
+            if not project_key:
+                project_key = input("Enter PROJECT_KEY: ").strip()
+        else:
+            # Non-interactive: use dummy values for mocked tests
+            # Since API calls are mocked, these values don't need to be real
+            token = token or "test-token-dummy"
+            project_key = project_key or "test-project-dummy"
+    
+    return token, project_key, environment_key
+
+# ------------------ TEST CASES ------------------
+
+def test_fetch_without_init_raises():
+    with pytest.raises(RuntimeError, match="not initialized"):
+        fetch_data("some_key")
+
+
+def test_send_email_without_init_raises():
+    with pytest.raises(RuntimeError, match="not initialized"):
+        send_email("Sub", "<p>Hi</p>")
+
+
+def test_default_environment_key_used():
+    token, project_key, _ = get_test_credentials()
+    test_env_key = "test_default_env_key"
+    set_worker_defaults(environment_key=test_env_key)
+    init(token, project_key)  # No env key passed
+    assert _config.ENVIRONMENT_KEY == test_env_key
+
+def test_env_fallbacks():
+    token, project_key, env_key = get_test_credentials()
+    # Use provided credentials as fallbacks
+    set_worker_defaults(token=token, project_key=project_key, environment_key=env_key or f"{project_key}_default")
+    init()  # Use fallback resolution
+    assert _config.LOGIN_TOKEN == token
+    assert _config.PROJECT_KEY == project_key
+    assert _config.ENVIRONMENT_KEY is not None  # Should be set (either from fallback or auto-generated)
+
+def test_init_from_dotenv(monkeypatch):
+    """init() resolves credentials from the uid/project_key/environment_key env vars."""
+    token, project_key, env_key = get_test_credentials()
+    env_key = env_key or f"{project_key}_default"
+
+    monkeypatch.setenv("uid", token)
+    monkeypatch.setenv("project_key", project_key)
+    monkeypatch.setenv("environment_key", env_key)
+
+    init()
+
+    assert _config.LOGIN_TOKEN == token
+    assert _config.PROJECT_KEY == project_key
+    assert _config.ENVIRONMENT_KEY == env_key
+
+
+@pytest.mark.slow
+def test_init_loads_dotenv_file(tmp_path, monkeypatch):
+    """Exercise the real .env file path: init() must load ./.env when credentials are unset."""
+    token, project_key, env_key = get_test_credentials()
+    env_key = env_key or f"{project_key}_default"
+
+    (tmp_path / ".env").write_text(
+        f"uid='{token}'\nproject_key='{project_key}'\nenvironment_key='{env_key}'\n"
+    )
+    monkeypatch.chdir(tmp_path)
+    # Registers the vars with monkeypatch so whatever the .env load sets is undone afterwards.
+    for var in ("uid", "project_key", "environment_key"):
+        monkeypatch.delenv(var, raising=False)
+
+    init()
+
+    assert _config.LOGIN_TOKEN == token
+    assert _config.PROJECT_KEY == project_key
+    assert _config.ENVIRONMENT_KEY == env_key
+
+
+def test_init_pool_size_resizes_http_session(monkeypatch):
+    import waveassist.utils as utils
+
+    # The session-wide fake backend is put back once this test is done.
+    old_session = mock.Mock()
+    monkeypatch.setattr(utils, "_SESSION", old_session)
+    monkeypatch.setattr(utils, "_SESSION_POOL_SIZE", utils._SESSION_POOL_SIZE)
+    token, project_key, _ = get_test_credentials()
+
+    init(token, project_key, pool_size=4)
+
+    assert utils._SESSION_POOL_SIZE == 4
+    assert utils._SESSION.get_adapter("https://api.waveassist.io")._pool_maxsize == 4
+    old_session.close.assert_called_once_with()  # the replaced pool is released
+
+
+def test_init_skips_dotenv_when_already_initialized(monkeypatch):
+    token, project_key, _ = get_test_credentials()
+    init(token, project_key)
+
+    def boom(*args, **kwargs):
+        raise AssertionError(".env must not be read once credentials are configured")
+
+    monkeypatch.setattr(waveassist, "dotenv_values", boom)
+    init(token, project_key)
+    assert _config.PROJECT_KEY == project_key
+
+
+def test_init_with_all_args_skips_dotenv(monkeypatch):
+    def boom(*args, **kwargs):
+        raise AssertionError(".env must not be read when every value is passed")
+
+    monkeypatch.setattr(waveassist, "dotenv_values", boom)
+    init("tok", "proj", environment_key="proj_staging", run_id=7)
+    assert (_config.ENVIRONMENT_KEY, _config.RUN_ID) == ("proj_staging", "7")
+
+
+def test_dotenv_read_at_most_once_per_path(tmp_path, monkeypatch):
+    calls = []
+
+    def fake_dotenv_values(path):
+        calls.append(path)
+        return {}
+
+    monkeypatch.setattr(waveassist, "dotenv_values", fake_dotenv_values)
+    monkeypatch.chdir(tmp_path)
+
+    waveassist._conditionally_load_env()
+    waveassist._conditionally_load_env()
+
+    assert calls == [str(tmp_path / ".env")]
+
+
+def test_init_from_config_ignores_env(monkeypatch):
+    monkeypatch.setenv("uid", "env-token")
+    monkeypatch.setenv("environment_key", "env-env")
+    monkeypatch.setattr(waveassist, "dotenv_values", lambda path: pytest.fail("read .env"))
+
+    init_from_config({"uid": "cfg-token", "project_key": "cfg-project", "run_id": 7})
+
+    assert _config.LOGIN_TOKEN == "cfg-token"
+    assert _config.PROJECT_KEY == "cfg-project"
+    assert _config.ENVIRONMENT_KEY == "cfg-project_default"
+    assert _config.RUN_ID == "7"
+
+
+def test_init_from_config_requires_credentials():
+    with pytest.raises(ValueError, match="project key is missing"):
+        init_from_config({"token": "cfg-token"})
@@ -3,15 +3,11 @@ Tests for JSON extraction and parsing functions: extract_json_from_content,
 soft_parse, and parse_json_response.
 """
 
-import sys
-import os
-
-# Add the parent directory to sys.path so we can import waveassist
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-
 from typing import Optional, List, Dict
+import pytest
 from pydantic import BaseModel, Field
 from waveassist.utils import (
+    _find_balanced_json,
     extract_json_from_content,
     soft_parse,
     parse_json_response,
@@ -121,8 +117,6 @@ def test_extract_pure_json():
     
     assert result["name"] == "John"
     assert result["age"] == 30
-    
-    print("✅ test_extract_pure_json passed")
 
 
 def test_extract_pure_json_with_whitespace():
@@ -132,8 +126,6 @@ def test_extract_pure_json_with_whitespace():
     
     assert result["name"] == "John"
     assert result["age"] == 30
-    
-    print("✅ test_extract_pure_json_with_whitespace passed")
 
 
 def test_extract_pure_json_complex():
@@ -144,8 +136,6 @@ def test_extract_pure_json_complex():
     assert result["user"]["name"] == "John"
     assert result["user"]["settings"]["theme"] == "dark"
     assert result["tags"] == ["a", "b"]
-    
-    print("✅ test_extract_pure_json_complex passed")
 
 
 def test_extract_pure_json_array():
@@ -156,8 +146,6 @@ def test_extract_pure_json_array():
     assert isinstance(result, list)
     assert len(result) == 2
     assert result[0]["id"] == 1
-    
-    print("✅ test_extract_pure_json_array passed")
 
 
 # Strategy 2: ```json code blocks
@@ -172,8 +160,6 @@ def test_extract_json_from_markdown_block():
     
     assert result["name"] == "Alice"
     assert result["score"] == 95
-    
-    print("✅ test_extract_json_from_markdown_block passed")
 
 
 def test_extract_json_from_markdown_block_with_whitespace():
@@ -187,8 +173,6 @@ def test_extract_json_from_markdown_block_with_whitespace():
     
     assert result["name"] == "Alice"
     assert result["score"] == 95
-    
-    print("✅ test_extract_json_from_markdown_block_with_whitespace passed")
 
 
 def test_extract_json_from_markdown_block_multiline():
@@ -205,8 +189,6 @@ def test_extract_json_from_markdown_block_multiline():
     assert result["name"] == "Alice"
     assert result["age"] == 30
     assert result["scores"] == [95, 88, 92]
-    
-    print("✅ test_extract_json_from_markdown_block_multiline passed")
 
 
 def test_extract_json_from_markdown_block_with_text_before():
@@ -220,8 +202,6 @@ That's the result.'''
     
     assert result["status"] == "success"
     assert result["data"]["value"] == 42
-    
-    print("✅ test_extract_json_from_markdown_block_with_text_before passed")
 
 
 # Strategy 3: Generic ``` code blocks
@@ -234,8 +214,6 @@ def test_extract_json_from_generic_code_block():
     
     assert result["title"] == "Test"
     assert result["count"] == 5
-    
-    print("✅ test_extract_json_from_generic_code_block passed")
 
 
 def test_extract_json_from_generic_code_block_multiple():
@@ -252,8 +230,6 @@ Some text
     # Should extract from first code block
     assert result["first"] == "block"
     assert "second" not in result
-    
-    print("✅ test_extract_json_from_generic_code_block_multiple passed")
 
 
 # Strategy 4: JSON object pattern { ... }
@@ -264,8 +240,6 @@ def test_extract_json_embedded_in_text():
     
     assert result["key"] == "value"
     assert result["number"] == 42
-    
-    print("✅ test_extract_json_embedded_in_text passed")
 
 
 def test_extract_json_object_with_nested():
@@ -276,8 +250,6 @@ def test_extract_json_object_with_nested():
     assert result["user"]["id"] == 123
     assert result["user"]["name"] == "John"
     assert result["status"] == "ok"
-    
-    print("✅ test_extract_json_object_with_nested passed")
 
 
 def test_extract_json_object_with_text_after():
@@ -287,8 +259,6 @@ def test_extract_json_object_with_text_after():
     
     assert result["status"] == "ok"
     assert result["value"] == 42
-    
-    print("✅ test_extract_json_object_with_text_after passed")
 
 
 def test_extract_json_object_with_arrays():
@@ -298,8 +268,23 @@ def test_extract_json_object_with_arrays():
     
     assert result["items"] == [1, 2, 3]
     assert result["tags"] == ["a", "b"]
-    
-    print("✅ test_extract_json_object_with_arrays passed")
+
+
+@pytest.mark.parametrize(
+    "content, expected",
+    [
+        ('x {"a": "}"} y', '{"a": "}"}'),  # closing brace inside a string
+        ('x {"a": "say \\"hi\\" {"} y', '{"a": "say \\"hi\\" {"}'),  # escaped quotes
+        ('x {"a": "back\\\\"} y', '{"a": "back\\\\"}'),  # escaped backslash ends the string
+        ('{"a": {"b": [1, {"c": 2}]}} {"d": 3}', '{"a": {"b": [1, {"c": 2}]}}'),
+        ('{"a": "multi\nline"}', '{"a": "multi\nline"}'),
+        ('{"a": "never closed}', None),
+        ('{"a": 1', None),
+        ('no json here', None),
+    ],
+)
+def test_find_balanced_json_respects_strings(content, expected):
+    assert _find_balanced_json(content, "{", "}") == expected
 
 
 # Strategy 5: JSON array pattern [ ... ]
@@ -310,8 +295,6 @@ def test_extract_json_array():
     
     assert isinstance(result, list)
     assert len(result) == 2
-    
-    print("✅ test_extract_json_array passed")
 
 
 def test_extract_json_array_simple():
@@ -321,8 +304,6 @@ def test_extract_json_array_simple():
     
     assert isinstance(result, list)
     assert result == [1, 2, 3, 4, 5]
-    
-    print("✅ test_extract_json_array_simple passed")
 
 
 def test_extract_json_array_nested():
@@ -332,8 +313,6 @@ def test_extract_json_array_nested():
     
     assert isinstance(result, list)
     assert result == [[1, 2], [3, 4], [5, 6]]
-    
-    print("✅ test_extract_json_array_nested passed")
 
 
 # Edge cases and error handling
@@ -346,8 +325,6 @@ def test_extract_json_empty_content():
         assert False, "Expected ValueError"
     except ValueError as e:
         assert "Empty content" in str(e)
-    
-    print("✅ test_extract_json_empty_content passed")
 
 
 def test_extract_json_whitespace_only():
@@ -359,8 +336,6 @@ def test_extract_json_whitespace_only():
         assert False, "Expected ValueError"
     except ValueError as e:
         assert "Could not extract valid JSON" in str(e)
-    
-    print("✅ test_extract_json_whitespace_only passed")
 
 
 def test_extract_json_invalid_raises():
@@ -372,8 +347,6 @@ def test_extract_json_invalid_raises():
         assert False, "Expected ValueError"
     except ValueError as e:
         assert "Could not extract valid JSON" in str(e)
-    
-    print("✅ test_extract_json_invalid_raises passed")
 
 
 def test_extract_json_malformed_in_code_block():
@@ -391,8 +364,6 @@ def test_extract_json_malformed_in_code_block():
     except ValueError as e:
         # If json_repair can't fix it, ValueError is expected
         assert "Could not extract valid JSON" in str(e)
-    
-    print("✅ test_extract_json_malformed_in_code_block passed")
 
 
 def test_extract_json_prefers_json_block_over_generic():
@@ -408,8 +379,6 @@ def test_extract_json_prefers_json_block_over_generic():
     # Should prefer ```json block (Strategy 2 over Strategy 3)
     assert result["json"] == "block"
     assert "generic" not in result
-    
-    print("✅ test_extract_json_prefers_json_block_over_generic passed")
 
 
 # ==================== TESTS FOR soft_parse ====================
@@ -423,8 +392,6 @@ def test_soft_parse_exact_match():
     assert result.age == 30
     assert result.score == 95.5
     assert result.is_active == True
-    
-    print("✅ test_soft_parse_exact_match passed")
 
 
 def test_soft_parse_ignores_extra_fields():
@@ -442,8 +409,6 @@ def test_soft_parse_ignores_extra_fields():
     assert result.name == "Jane"
     assert result.age == 25
     assert not hasattr(result, "extra_field")
-    
-    print("✅ test_soft_parse_ignores_extra_fields passed")
 
 
 def test_soft_parse_ignores_multiple_extra_fields():
@@ -465,8 +430,6 @@ def test_soft_parse_ignores_multiple_extra_fields():
     assert not hasattr(result, "extra2")
     assert not hasattr(result, "extra3")
     assert not hasattr(result, "extra4")
-    
-    print("✅ test_soft_parse_ignores_multiple_extra_fields passed")
 
 
 def test_soft_parse_with_optional_missing():
@@ -478,8 +441,6 @@ def test_soft_parse_with_optional_missing():
     assert result.optional_string is None
     assert result.optional_int is None
     assert result.optional_with_default == "default_value"
-    
-    print("✅ test_soft_parse_with_optional_missing passed")
 
 
 def test_soft_parse_with_optional_provided():
@@ -495,8 +456,6 @@ def test_soft_parse_with_optional_provided():
     assert result.optional_string == "provided"
     assert result.optional_int == 42
     assert result.optional_with_default == "default_value"
-    
-    print("✅ test_soft_parse_with_optional_provided passed")
 
 
 def test_soft_parse_with_partial_optionals():
@@ -511,8 +470,6 @@ def test_soft_parse_with_partial_optionals():
     assert result.required_field == "present"
     assert result.optional_string == "provided"
     assert result.optional_int is None
-    
-    print("✅ test_soft_parse_with_partial_optionals passed")
 
 
 def test_soft_parse_nested_model():
@@ -531,8 +488,6 @@ def test_soft_parse_nested_model():
     assert result.name == "Bob"
     assert result.address.city == "Boston"
     assert result.address.street == "123 Main St"
-    
-    print("✅ test_soft_parse_nested_model passed")
 
 
 def test_soft_parse_nested_model_with_extra():
@@ -554,8 +509,6 @@ def test_soft_parse_nested_model_with_extra():
     assert result.address.city == "Boston"
     assert not hasattr(result, "extra_top_level")
     # Note: nested extra fields might still be in the dict but Pydantic will ignore them
-    
-    print("✅ test_soft_parse_nested_model_with_extra passed")
 
 
 def test_soft_parse_nested_model_optional():
@@ -581,8 +534,6 @@ def test_soft_parse_nested_model_optional():
     assert result.owner is not None
     assert result.owner.name == "Owner"
     assert result.owner.address.city == "Seattle"
-    
-    print("✅ test_soft_parse_nested_model_optional passed")
 
 
 def test_soft_parse_nested_model_optional_missing():
@@ -598,8 +549,6 @@ def test_soft_parse_nested_model_optional_missing():
     
     assert result.id == "123"
     assert result.owner is None
-    
-    print("✅ test_soft_parse_nested_model_optional_missing passed")
 
 
 def test_soft_parse_with_lists():
@@ -614,8 +563,6 @@ def test_soft_parse_with_lists():
     assert result.tags == ["python", "testing", "pydantic"]
     assert result.scores == [95, 88, 92]
     assert result.items == [1.5, 2.5, 3.5]
-    
-    print("✅ test_soft_parse_with_lists passed")
 
 
 def test_soft_parse_with_lists_and_extra():
@@ -632,8 +579,6 @@ def test_soft_parse_with_lists_and_extra():
     assert result.tags == ["python", "testing"]
     assert not hasattr(result, "extra_list")
     assert not hasattr(result, "extra_field")
-    
-    print("✅ test_soft_parse_with_lists_and_extra passed")
 
 
 def test_soft_parse_with_list_of_nested():
@@ -654,8 +599,6 @@ def test_soft_parse_with_list_of_nested():
     assert result.items[0].product_name == "Widget"
     assert result.items[1].product_name == "Gadget"
     assert result.total == 40.0
-    
-    print("✅ test_soft_parse_with_list_of_nested passed")
 
 
 def test_soft_parse_with_list_of_nested_extra():
@@ -679,8 +622,6 @@ def test_soft_parse_with_list_of_nested_extra():
     assert len(result.items) == 1
     assert result.items[0].product_name == "Widget"
     assert not hasattr(result, "extra_order_field")
-    
-    print("✅ test_soft_parse_with_list_of_nested_extra passed")
 
 
 def test_soft_parse_deeply_nested():
@@ -702,8 +643,6 @@ def test_soft_parse_deeply_nested():
     assert result.level1_field == "top"
     assert result.nested.name == "Person"
     assert result.nested.address.city == "Portland"
-    
-    print("✅ test_soft_parse_deeply_nested passed")
 
 
 def test_soft_parse_type_coercion_string_to_int():
@@ -719,8 +658,6 @@ def test_soft_parse_type_coercion_string_to_int():
     # Pydantic should attempt coercion
     assert result.age == 30  # Should be coerced to int
     assert isinstance(result.age, int)
-    
-    print("✅ test_soft_parse_type_coercion_string_to_int passed")
 
 
 def test_soft_parse_type_coercion_string_to_float():
@@ -736,8 +673,6 @@ def test_soft_parse_type_coercion_string_to_float():
     # Pydantic should attempt coercion
     assert result.score == 95.5
     assert isinstance(result.score, float)
-    
-    print("✅ test_soft_parse_type_coercion_string_to_float passed")
 
 
 def test_soft_parse_type_coercion_bool():
@@ -753,8 +688,6 @@ def test_soft_parse_type_coercion_bool():
     # Pydantic should attempt coercion
     assert result.is_active == True
     assert isinstance(result.is_active, bool)
-    
-    print("✅ test_soft_parse_type_coercion_bool passed")
 
 
 def test_soft_parse_with_dict_metadata():
@@ -771,8 +704,6 @@ def test_soft_parse_with_dict_metadata():
     assert result.metadata is not None
     assert result.metadata["key1"] == "value1"
     assert result.metadata["key2"] == "value2"
-    
-    print("✅ test_soft_parse_with_dict_metadata passed")
 
 
 def test_soft_parse_with_dict_metadata_missing():
@@ -787,8 +718,6 @@ def test_soft_parse_with_dict_metadata_missing():
     result = soft_parse(ComplexModel, data)
     
     assert result.metadata is None
-    
-    print("✅ test_soft_parse_with_dict_metadata_missing passed")
 
 
 # ==================== TESTS FOR soft_parse SAFETY FALLBACK ====================
@@ -809,8 +738,6 @@ def test_soft_parse_missing_required_field():
     assert result.is_active == True
     # Missing required field should be None (filled in by soft_parse)
     assert result.age is None
-    
-    print("✅ test_soft_parse_missing_required_field passed")
 
 
 def test_soft_parse_missing_multiple_required_fields():
@@ -827,8 +754,6 @@ def test_soft_parse_missing_multiple_required_fields():
     assert result.age is None
     assert result.score is None
     assert result.is_active is None
-    
-    print("✅ test_soft_parse_missing_multiple_required_fields passed")
 
 
 def test_soft_parse_empty_data():
@@ -841,8 +766,6 @@ def test_soft_parse_empty_data():
     assert result.age is None
     assert result.score is None
     assert result.is_active is None
-    
-    print("✅ test_soft_parse_empty_data passed")
 
 
 def test_soft_parse_nested_missing_required():
@@ -863,8 +786,6 @@ def test_soft_parse_nested_missing_required():
     assert result.email is None  # Filled in by soft_parse
     # Nested model may have partial data
     assert result.address is not None
-    
-    print("✅ test_soft_parse_nested_missing_required passed")
 
 
 def test_soft_parse_partial_list_items():
@@ -890,8 +811,6 @@ def test_soft_parse_partial_list_items():
         assert item["product_name"] == "Widget"
     else:
         assert item.product_name == "Widget"
-    
-    print("✅ test_soft_parse_partial_list_items passed")
 
 
 def test_soft_parse_invalid_type_falls_back():
@@ -910,8 +829,6 @@ def test_soft_parse_invalid_type_falls_back():
     assert result.is_active == True
     # The invalid value is kept as-is since model_construct bypasses validation
     assert result.age == "not_a_number"
-    
-    print("✅ test_soft_parse_invalid_type_falls_back passed")
 
 
 # ==================== TESTS FOR soft_parse WITH default_factory ====================
@@ -924,8 +841,6 @@ def test_soft_parse_default_factory_list():
     assert result.name == "Test"
     assert isinstance(result.items, list), f"Expected list, got {type(result.items)}"
     assert result.items == [], f"Expected empty list, got {result.items}"
-    
-    print("✅ test_soft_parse_default_factory_list passed")
 
 
 def test_soft_parse_default_factory_dict():
@@ -935,8 +850,6 @@ def test_soft_parse_default_factory_dict():
     
     assert isinstance(result.metadata, dict), f"Expected dict, got {type(result.metadata)}"
     assert result.metadata == {}, f"Expected empty dict, got {result.metadata}"
-    
-    print("✅ test_soft_parse_default_factory_dict passed")
 
 
 def test_soft_parse_default_factory_lambda():
@@ -946,8 +859,6 @@ def test_soft_parse_default_factory_lambda():
     
     assert isinstance(result.count, int), f"Expected int, got {type(result.count)}"
     assert result.count == 0, f"Expected 0, got {result.count}"
-    
-    print("✅ test_soft_parse_default_factory_lambda passed")
 
 
 def test_soft_parse_default_factory_mixed():
@@ -960,8 +871,6 @@ def test_soft_parse_default_factory_mixed():
     assert result.items == [], f"Expected empty list, got {result.items}"
     assert result.optional_field is None
     assert result.field_with_default == "default_value"
-    
-    print("✅ test_soft_parse_default_factory_mixed passed")
 
 
 def test_soft_parse_default_factory_provided_value():
@@ -972,8 +881,6 @@ def test_soft_parse_default_factory_provided_value():
     assert result.name == "Test"
     assert result.items == [1, 2, 3], "Should use provided value, not factory"
     assert result.metadata == {"key": "value"}, "Should use provided value, not factory"
-    
-    print("✅ test_soft_parse_default_factory_provided_value passed")
 
 
 def test_soft_parse_default_factory_partial_missing():
@@ -987,8 +894,6 @@ def test_soft_parse_default_factory_partial_missing():
     assert result.metadata == {}
     assert isinstance(result.count, int)
     assert result.count == 0
-    
-    print("✅ test_soft_parse_default_factory_partial_missing passed")
 
 
 # ==================== TESTS FOR parse_json_response ====================
@@ -1002,8 +907,6 @@ def test_parse_json_response_simple():
     assert result.age == 42
     assert result.score == 99.9
     assert result.is_active == True
-    
-    print("✅ test_parse_json_response_simple passed")
 
 
 def test_parse_json_response_with_extras():
@@ -1014,8 +917,6 @@ def test_parse_json_response_with_extras():
     assert result.name == "Test"
     assert result.age == 42
     assert not hasattr(result, "extra")
-    
-    print("✅ test_parse_json_response_with_extras passed")
 
 
 def test_parse_json_response_from_markdown():
@@ -1030,8 +931,6 @@ def test_parse_json_response_from_markdown():
     assert result.name == "Markdown"
     assert result.age == 10
     assert result.is_active == False
-    
-    print("✅ test_parse_json_response_from_markdown passed")
 
 
 def test_parse_json_response_from_generic_code_block():
@@ -1043,8 +942,6 @@ def test_parse_json_response_from_generic_code_block():
     
     assert result.name == "Generic"
     assert result.age == 25
-    
-    print("✅ test_parse_json_response_from_generic_code_block passed")
 
 
 def test_parse_json_response_embedded_in_text():
@@ -1054,8 +951,6 @@ def test_parse_json_response_embedded_in_text():
     
     assert result.name == "Embedded"
     assert result.age == 30
-    
-    print("✅ test_parse_json_response_embedded_in_text passed")
 
 
 def test_parse_json_response_with_nested_model():
@@ -1077,8 +972,6 @@ def test_parse_json_response_with_nested_model():
     assert result.email == "alice@example.com"
     assert result.address.city == "Boston"
     assert result.address.street == "123 Main St"
-    
-    print("✅ test_parse_json_response_with_nested_model passed")
 
 
 def test_parse_json_response_with_nested_model_extra():
@@ -1099,8 +992,6 @@ def test_parse_json_response_with_nested_model_extra():
     assert result.name == "Bob"
     assert result.address.city == "Seattle"
     assert not hasattr(result, "extra_top_field")
-    
-    print("✅ test_parse_json_response_with_nested_model_extra passed")
 
 
 def test_parse_json_response_with_optionals():
@@ -1112,8 +1003,6 @@ def test_parse_json_response_with_optionals():
     assert result.optional_string == "provided"
     assert result.optional_int is None
     assert result.optional_with_default == "default_value"
-    
-    print("✅ test_parse_json_response_with_optionals passed")
 
 
 def test_parse_json_response_with_optionals_missing():
@@ -1124,8 +1013,6 @@ def test_parse_json_response_with_optionals_missing():
     assert result.required_field == "present"
     assert result.optional_string is None
     assert result.optional_int is None
-    
-    print("✅ test_parse_json_response_with_optionals_missing passed")
 
 
 def test_parse_json_response_with_lists():
@@ -1142,8 +1029,6 @@ def test_parse_json_response_with_lists():
     assert result.tags == ["python", "testing", "pydantic"]
     assert result.scores == [95, 88, 92]
     assert result.items == [1.5, 2.5, 3.5]
-    
-    print("✅ test_parse_json_response_with_lists passed")
 
 
 def test_parse_json_response_with_list_of_nested():
@@ -1165,8 +1050,6 @@ def test_parse_json_response_with_list_of_nested():
     assert result.items[0].product_name == "Widget"
     assert result.items[1].product_name == "Gadget"
     assert result.total == 40.0
-    
-    print("✅ test_parse_json_response_with_list_of_nested passed")
 
 
 def test_parse_json_response_complex_model():
@@ -1201,8 +1084,6 @@ def test_parse_json_response_complex_model():
     assert result.owner.address.city == "Portland"
     assert len(result.items) == 1
     assert result.items[0].product_name == "Product"
-    
-    print("✅ test_parse_json_response_complex_model passed")
 
 
 def test_parse_json_response_type_coercion():
@@ -1217,8 +1098,6 @@ def test_parse_json_response_type_coercion():
     assert isinstance(result.score, float)
     assert result.is_active == True
     assert isinstance(result.is_active, bool)
-    
-    print("✅ test_parse_json_response_type_coercion passed")
 
 
 def test_parse_json_response_multiline_markdown():
@@ -1238,8 +1117,6 @@ That's all.'''
     assert result.name == "Multiline"
     assert result.age == 35
     assert result.score == 87.5
-    
-    print("✅ test_parse_json_response_multiline_markdown passed")
 
 
 def test_parse_json_response_with_array_takes_first():
@@ -1251,8 +1128,6 @@ def test_parse_json_response_with_array_takes_first():
     assert result.age == 25
     assert result.score == 85.0
     assert result.is_active is True
-    
-    print("✅ test_parse_json_response_with_array_takes_first passed")
 
 
 def test_parse_json_response_with_array_in_markdown():
@@ -1265,8 +1140,6 @@ def test_parse_json_response_with_array_in_markdown():
     assert result.name == "ArrayItem"
     assert result.age == 42
     assert result.score == 99.9
-    
-    print("✅ test_parse_json_response_with_array_in_markdown passed")
 
 
 def test_parse_json_response_empty_array_raises():
@@ -1278,8 +1151,6 @@ def test_parse_json_response_empty_array_raises():
     except ValueError as e:
         assert "empty array" in str(e).lower() or "array" in str(e).lower()
         assert "SimpleModel" in str(e) or "object" in str(e).lower()
-    
-    print("✅ test_parse_json_response_empty_array_raises passed")
 
 
 def test_parse_json_response_array_with_non_object_raises():
@@ -1290,112 +1161,3 @@ def test_parse_json_response_array_with_non_object_raises():
         assert False, "Should have raised ValueError for array with non-object elements"
     except ValueError as e:
         assert "object" in str(e).lower() or "array" in str(e).lower()
-    
-    print("✅ test_parse_json_response_array_with_non_object_raises passed")
-
-
-# ==================== RUN ALL TESTS ====================
-
-if __name__ == "__main__":
-    print("\n" + "="*60)
-    print("Testing extract_json_from_content")
-    print("="*60)
-    # Strategy 1: Pure JSON
-    test_extract_pure_json()
-    test_extract_pure_json_with_whitespace()
-    test_extract_pure_json_complex()
-    test_extract_pure_json_array()
-    # Strategy 2: ```json code blocks
-    test_extract_json_from_markdown_block()
-    test_extract_json_from_markdown_block_with_whitespace()
-    test_extract_json_from_markdown_block_multiline()
-    test_extract_json_from_markdown_block_with_text_before()
-    # Strategy 3: Generic ``` code blocks
-    test_extract_json_from_generic_code_block()
-    test_extract_json_from_generic_code_block_multiple()
-    # Strategy 4: JSON object pattern
-    test_extract_json_embedded_in_text()
-    test_extract_json_object_with_nested()
-    test_extract_json_object_with_text_after()
-    test_extract_json_object_with_arrays()
-    # Strategy 5: JSON array pattern
-    test_extract_json_array()
-    test_extract_json_array_simple()
-    test_extract_json_array_nested()
-    # Edge cases
-    test_extract_json_empty_content()
-    test_extract_json_whitespace_only()
-    test_extract_json_invalid_raises()
-    test_extract_json_malformed_in_code_block()
-    test_extract_json_prefers_json_block_over_generic()
-    
-    print("\n" + "="*60)
-    print("Testing soft_parse")
-    print("="*60)
-    test_soft_parse_exact_match()
-    test_soft_parse_ignores_extra_fields()
-    test_soft_parse_ignores_multiple_extra_fields()
-    test_soft_parse_with_optional_missing()
-    test_soft_parse_with_optional_provided()
-    test_soft_parse_with_partial_optionals()
-    test_soft_parse_nested_model()
-    test_soft_parse_nested_model_with_extra()
-    test_soft_parse_nested_model_optional()
-    test_soft_parse_nested_model_optional_missing()
-    test_soft_parse_with_lists()
-    test_soft_parse_with_lists_and_extra()
-    test_soft_parse_with_list_of_nested()
-    test_soft_parse_with_list_of_nested_extra()
-    test_soft_parse_deeply_nested()
-    test_soft_parse_type_coercion_string_to_int()
-    test_soft_parse_type_coercion_string_to_float()
-    test_soft_parse_type_coercion_bool()
-    test_soft_parse_with_dict_metadata()
-    test_soft_parse_with_dict_metadata_missing()
-    
-    print("\n" + "="*60)
-    print("Testing soft_parse safety fallback")
-    print("="*60)
-    test_soft_parse_missing_required_field()
-    test_soft_parse_missing_multiple_required_fields()
-    test_soft_parse_empty_data()
-    test_soft_parse_nested_missing_required()
-    test_soft_parse_partial_list_items()
-    test_soft_parse_invalid_type_falls_back()
-    
-    print("\n" + "="*60)
-    print("Testing soft_parse with default_factory")
-    print("="*60)
-    test_soft_parse_default_factory_list()
-    test_soft_parse_default_factory_dict()
-    test_soft_parse_default_factory_lambda()
-    test_soft_parse_default_factory_mixed()
-    test_soft_parse_default_factory_provided_value()
-    test_soft_parse_default_factory_partial_missing()
-    
-    print("\n" + "="*60)
-    print("Testing parse_json_response")
-    print("="*60)
-    test_parse_json_response_simple()
-    test_parse_json_response_with_extras()
-    test_parse_json_response_from_markdown()
-    test_parse_json_response_from_generic_code_block()
-    test_parse_json_response_embedded_in_text()
-    test_parse_json_response_with_nested_model()
-    test_parse_json_response_with_nested_model_extra()
-    test_parse_json_response_with_optionals()
-    test_parse_json_response_with_optionals_missing()
-    test_parse_json_response_with_lists()
-    test_parse_json_response_with_list_of_nested()
-    test_parse_json_response_complex_model()
-    test_parse_json_response_type_coercion()
-    test_parse_json_response_multiline_markdown()
-    test_parse_json_response_with_array_takes_first()
-    test_parse_json_response_with_array_in_markdown()
-    test_parse_json_response_empty_array_raises()
-    test_parse_json_response_array_with_non_object_raises()
-    
-    print("\n" + "="*60)
-    print("🎉 All JSON extraction/parsing tests passed!")
-    print("="*60)
-
@@ -6,9 +6,6 @@ import sys
 import os
 import argparse
 
-# Add the parent directory to sys.path so we can import waveassist
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-
 from typing import List
 from pydantic import BaseModel
 from waveassist import init, call_llm
@@ -20,7 +17,7 @@ from waveassist.constants import OPENROUTER_API_STORED_DATA_KEY
 # so it never leaks into other test modules.
 import waveassist
 
-def mock_fetch_data(key: str):
+def mock_fetch_data(key: str, **kwargs):
     """Mock fetch_data to return API key when requested."""
     if key == OPENROUTER_API_STORED_DATA_KEY:
         return mock_fetch_data.api_key
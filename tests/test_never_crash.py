@@ -14,11 +14,9 @@ Functions tested:
 """
 
 import sys
-import os
 import math
 import pandas as pd
-
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import pytest
 
 from waveassist import (
     init,
@@ -89,9 +87,14 @@ def mock_call_get_api_exception(path, params):
 
 import waveassist
 
-waveassist.call_post_api = mock_call_post_api
-waveassist.call_get_api = mock_call_get_api
-waveassist.call_post_api_with_files = mock_call_post_api_with_files
+
+@pytest.fixture(autouse=True)
+def _isolate_backend_mocks(monkeypatch):
+    """reset() swaps this module's mocks into waveassist; put back whatever was
+    installed before (conftest's mocks) once each test finishes, so other
+    modules never inherit them — including on a shared xdist worker."""
+    for name in ("call_post_api", "call_get_api", "call_post_api_with_files"):
+        monkeypatch.setattr(waveassist, name, getattr(waveassist, name))
 
 
 # ------------------------------------------------------------------ helpers
@@ -5,14 +5,11 @@ Tests for LLM provider routing in call_llm:
   - azure config validation and max_tokens -> max_completion_tokens rename
   - claude_cli routing (local CLI, no OpenAI client)
 """
-import sys
 import os
 import json
 from types import SimpleNamespace
 
-# Add the parent directory to sys.path so we can import waveassist
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-
+import openai
 import pytest
 from pydantic import BaseModel
 
@@ -38,7 +35,7 @@ def store(monkeypatch):
     """In-memory backing for fetch_data; returns the dict to populate per test."""
     data = {}
 
-    def fake_fetch_data(key, run_based=False, default=None):
+    def fake_fetch_data(key, run_based=False, default=None, cache_ttl=0):
         return data.get(key, default)
 
     monkeypatch.setattr(waveassist, "fetch_data", fake_fetch_data)
@@ -79,6 +76,23 @@ def test_openrouter_client(store):
     assert client.kwargs["base_url"] == OPENROUTER_URL
 
 
+def test_hosted_clients_have_bounded_timeout_and_no_sdk_retries(store):
+    from waveassist.constants import LLM_REQUEST_TIMEOUT
+
+    store[OPENROUTER_API_STORED_DATA_KEY] = "or-key-123"
+    client = waveassist._resolve_llm_client("openrouter", {})
+    assert client.kwargs["timeout"] == LLM_REQUEST_TIMEOUT
+    assert client.kwargs["max_retries"] == 0  # call_llm's own loop retries transport errors
+
+
+def test_openrouter_client_reused_across_calls(store):
+    store[OPENROUTER_API_STORED_DATA_KEY] = "or-key-123"
+    first = waveassist._resolve_llm_client("openrouter", {})
+    assert waveassist._resolve_llm_client("openrouter", {}) is first
+    store[OPENROUTER_API_STORED_DATA_KEY] = "or-key-rotated"
+    assert waveassist._resolve_llm_client("openrouter", {}).kwargs["api_key"] == "or-key-rotated"
+
+
 def test_openrouter_missing_key_raises(store):
     with pytest.raises(ValueError, match="OpenRouter API key not found"):
         waveassist._resolve_llm_client("openrouter", {})
@@ -185,6 +199,9 @@ def test_azure_api_type_invalid_raises(store):
 class _RecordingClient:
     """Fake OpenAI client that records which API surface call_llm invoked."""
 
+    reject_schema = False  # chat.completions.parse raises BadRequestError, like a strict-mode rejection
+    parse_reply = None  # optional callable(kwargs) that replaces chat.completions.parse's result
+
     def __init__(self, **kwargs):
         self.kwargs = kwargs
         self.calls = []
@@ -209,6 +226,17 @@ class _RecordingClient:
                 choices=[SimpleNamespace(message=SimpleNamespace(content='{"ok": true}'))]
             )
 
+        def parse(self, **kw):
+            self.parent.calls.append(("chat.completions.parse", kw))
+            if self.parent.reject_schema:
+                response = SimpleNamespace(status_code=400, headers={}, request=None)
+                raise openai.BadRequestError("Invalid schema for response_format", response=response, body=None)
+            if self.parent.parse_reply is not None:
+                return self.parent.parse_reply(kw)
+            return SimpleNamespace(
+                choices=[SimpleNamespace(message=SimpleNamespace(parsed=_Dummy(ok=True), content='{"ok": true}'))]
+            )
+
 
 @pytest.fixture
 def azure_routing(monkeypatch, store):
@@ -259,7 +287,117 @@ def test_call_llm_azure_chat_completions_is_default(azure_routing):
 
     assert isinstance(result, _Dummy)
     client = created[-1]
-    assert [c[0] for c in client.calls] == ["chat.completions.create"]
+    # gpt-5.x supports structured outputs, so the schema-constrained chat call is used
+    assert [c[0] for c in client.calls] == ["chat.completions.parse"]
+
+
+def test_chat_structured_output_sends_schema_not_template(azure_routing):
+    store, created = azure_routing
+    store[AZURE_OPENAI_CONFIG_STORED_DATA_KEY] = {"api_key": "k", "endpoint": "https://x.openai.azure.com/"}
+
+    waveassist.call_llm("openai/gpt-4.1-mini", "hello", _Dummy, temperature=0)
+
+    name, kw = created[-1].calls[0]
+    assert name == "chat.completions.parse"
+    assert kw["response_format"] is _Dummy
+    assert kw["messages"] == [{"role": "user", "content": "hello"}]
+    assert kw["temperature"] == 0
+
+
+def test_chat_structured_output_rejection_falls_back_to_json_mode(azure_routing, monkeypatch):
+    store, created = azure_routing
+    store[AZURE_OPENAI_CONFIG_STORED_DATA_KEY] = {"api_key": "k", "endpoint": "https://x.openai.azure.com/"}
+    monkeypatch.setattr(_RecordingClient, "reject_schema", True)
+    monkeypatch.setattr(waveassist, "_STRUCTURED_OUTPUT_REJECTED", set())
+
+    assert waveassist.call_llm("gpt-5.4", "hello", _Dummy).ok is True
+    assert [c[0] for c in created[-1].calls] == ["chat.completions.parse", "chat.completions.create"]
+    assert created[-1].calls[1][1]["response_format"] == {"type": "json_object"}
+
+    # The rejection is remembered: the next call goes straight to JSON mode.
+    waveassist.call_llm("gpt-5.4", "hello again", _Dummy)
+    assert created[-1].calls[-1][0] == "chat.completions.create"
+    assert [c[0] for c in created[-1].calls].count("chat.completions.parse") == 1
+
+
+def _completion(content):
+    message = SimpleNamespace(parsed=None, content=content)
+    return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+
+
+def test_chat_structured_output_soft_parses_truncated_reply(azure_routing, monkeypatch):
+    store, created = azure_routing
+    store[AZURE_OPENAI_CONFIG_STORED_DATA_KEY] = {"api_key": "k", "endpoint": "https://x.openai.azure.com/"}
+
+    def truncated(kw):
+        raise openai.LengthFinishReasonError(completion=_completion('{"ok": true'))
+
+    monkeypatch.setattr(_RecordingClient, "parse_reply", staticmethod(truncated))
+
+    assert waveassist.call_llm("gpt-5.4", "hello", _Dummy).ok is True  # repaired, not retried
+    assert [c[0] for c in created[-1].calls] == ["chat.completions.parse"]
+
+
+def test_chat_structured_output_filtered_without_content_uses_json_mode(azure_routing, monkeypatch):
+    store, created = azure_routing
+    store[AZURE_OPENAI_CONFIG_STORED_DATA_KEY] = {"api_key": "k", "endpoint": "https://x.openai.azure.com/"}
+
+    def filtered(kw):
+        raise openai.ContentFilterFinishReasonError()
+
+    monkeypatch.setattr(_RecordingClient, "parse_reply", staticmethod(filtered))
+
+    assert waveassist.call_llm("gpt-5.4", "hello", _Dummy).ok is True
+    assert [c[0] for c in created[-1].calls] == ["chat.completions.parse", "chat.completions.create"]
+
+
+def test_chat_structured_output_invalid_reply_gets_format_retry(azure_routing, monkeypatch):
+    store, created = azure_routing
+    store[AZURE_OPENAI_CONFIG_STORED_DATA_KEY] = {"api_key": "k", "endpoint": "https://x.openai.azure.com/"}
+    replies = iter([_completion("not json at all"), _completion('{"ok": true}')])
+    monkeypatch.setattr(_RecordingClient, "parse_reply", staticmethod(lambda kw: next(replies)))
+
+    assert waveassist.call_llm("gpt-5.4", "hello", _Dummy, should_retry=True).ok is True
+    calls = created[-1].calls
+    assert [c[0] for c in calls] == ["chat.completions.parse", "chat.completions.parse"]
+    assert "IMPORTANT" in calls[1][1]["messages"][0]["content"]
+    assert calls[1][1]["temperature"] == 0.2
+
+
+def test_chat_non_schema_bad_request_does_not_disable_structured_output(azure_routing, monkeypatch):
+    store, created = azure_routing
+    store[AZURE_OPENAI_CONFIG_STORED_DATA_KEY] = {"api_key": "k", "endpoint": "https://x.openai.azure.com/"}
+    monkeypatch.setattr(waveassist, "_STRUCTURED_OUTPUT_REJECTED", set())
+    monkeypatch.setattr(waveassist.time, "sleep", lambda s: None)
+
+    def bad_kwarg(kw):
+        response = SimpleNamespace(status_code=400, headers={}, request=None)
+        raise openai.BadRequestError("Unsupported value: 'temperature'", response=response, body=None)
+
+    monkeypatch.setattr(_RecordingClient, "parse_reply", staticmethod(bad_kwarg))
+
+    with pytest.raises(RuntimeError, match="temperature"):
+        waveassist.call_llm("gpt-5.4", "hello", _Dummy, temperature=3)
+    assert waveassist._STRUCTURED_OUTPUT_REJECTED == set()
+    assert [c[0] for c in created[-1].calls] == ["chat.completions.parse", "chat.completions.parse"]
+
+
+@pytest.mark.parametrize("model, expected", [
+    ("deepseek/deepseek-chat", {"type": "json_object"}),
+    ("x-ai/Grok-4", None),  # matched case-insensitively
+    ("perplexity/sonar", None),
+])
+def test_chat_path_json_format_only_for_supported_models(azure_routing, model, expected):
+    store, created = azure_routing
+    store[AZURE_OPENAI_CONFIG_STORED_DATA_KEY] = {
+        "api_key": "k",
+        "endpoint": "https://x.openai.azure.com/",
+    }
+
+    waveassist.call_llm(model, "hello", _Dummy)
+
+    _, kw = created[-1].calls[0]
+    assert kw["response_format"] == expected
 
 
 def test_responses_path_drops_unsupported_sampling_params(azure_routing):
@@ -1,5 +1,9 @@
+import base64
+import copy
+import io
 import logging
 import requests
+import numpy as np
 import pandas as pd
 import time
 import json
@@ -8,18 +12,25 @@ import shutil
 import subprocess
 import tempfile
 import uuid
-from dotenv import load_dotenv
-from typing import Type, TypeVar, Literal, Optional, Any, BinaryIO
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import dotenv_values
+from typing import Type, TypeVar, Literal, Optional, Any, BinaryIO, Dict
 from pydantic import BaseModel
+from functools import lru_cache
 from pathlib import Path
-from openai import OpenAI
+from openai import BadRequestError, ContentFilterFinishReasonError, LengthFinishReasonError, OpenAI
 from datetime import datetime
 
-from waveassist import _config
+from waveassist import _config, _llm_cache
 from waveassist.constants import (
+    LLM_CONFIG_CACHE_TTL,
+    LLM_REQUEST_TIMEOUT,
+    LLM_CLIENT_MAX_RETRIES,
+    LLM_RESPONSE_CACHE_TTL,
     OPENROUTER_URL,
     OPENROUTER_API_STORED_DATA_KEY,
     UNSUPPORTED_JSON_MODELS_ARRAY,
+    STRUCTURED_OUTPUT_MODELS,
     LLM_PROVIDER_STORED_DATA_KEY,
     AZURE_OPENAI_CONFIG_STORED_DATA_KEY,
     LLM_MODELS_STORED_DATA_KEY,
@@ -39,18 +50,26 @@ from waveassist.utils import (
     call_post_api,
     call_get_api,
     call_post_api_with_files,
+    configure_http_session,
     create_json_prompt,
     parse_json_response,
+    JsonTemplateModel,
+    _backoff,
+    _json_dumps,
+    _json_loads,
 )
 
 logger = logging.getLogger("waveassist")
 
 __all__ = [
     "init",
+    "init_from_config",
     "set_worker_defaults",
     "set_default_environment_key",
     "store_data",
+    "store_data_many",
     "fetch_data",
+    "invalidate_cache",
     "publish_dashboard",
     "send_email",
     "fetch_openrouter_credits",
@@ -59,6 +78,8 @@ __all__ = [
     "mark_run_idle",
     "is_test_run",
     "StoreDataType",
+    "DataFrameFormat",
+    "JsonTemplateModel",
 ]
 
 
@@ -67,11 +88,27 @@ __all__ = [
 T = TypeVar('T', bound=BaseModel)
 
 
+@lru_cache(maxsize=8)
+def _load_env_once(env_path: str) -> dict:
+    """Parse a .env file once per process and add its values to os.environ.
+
+    Variables already set in the environment win, as with
+    load_dotenv(override=False). A missing file parses as {}.
+    Tests reset the memo with _load_env_once.cache_clear().
+    """
+    values = {k: v for k, v in dotenv_values(env_path).items() if v is not None}
+    for key, value in values.items():
+        os.environ.setdefault(key, value)
+    return values
+
+
 def _conditionally_load_env():
+    # Re-init in a process that already has credentials: nothing to look up
+    if _config.LOGIN_TOKEN and _config.PROJECT_KEY:
+        return
     # Only load .env if UID/project_key aren't set
     if not os.getenv("uid") or not os.getenv("project_key"):
-        env_path = Path.cwd() / ".env"  # Use the project root (not library path)
-        load_dotenv(dotenv_path=env_path, override=False)
+        _load_env_once(str(Path.cwd() / ".env"))  # Use the project root (not library path)
 
 
 def init(
@@ -80,40 +117,81 @@ def init(
     environment_key: str = None,
     run_id: str = None,
     check_credits: bool = False,
+    pool_size: Optional[int] = None,
 ) -> None:
-    _conditionally_load_env()  # Load from .env if it exists
+    # Everything passed explicitly: no .env or environment lookups needed
+    if not (token and project_key and environment_key and run_id):
+        _conditionally_load_env()  # Load from .env if it exists
 
     # Resolve UID/token
-    resolved_token = (
-        token or os.getenv("uid") or getattr(_config, "DEFAULT_LOGIN_TOKEN", None)
-    )
+    resolved_token = token or os.getenv("uid") or _config.DEFAULT_LOGIN_TOKEN
 
     # Resolve project_key
     resolved_project_key = (
-        project_key
-        or os.getenv("project_key")
-        or getattr(_config, "DEFAULT_PROJECT_KEY", None)
+        project_key or os.getenv("project_key") or _config.DEFAULT_PROJECT_KEY
     )
 
-    # Resolve env_key
+    # Resolve env_key; only the last-resort default depends on the project key
     resolved_env_key = (
         environment_key
         or os.getenv("environment_key")
-        or getattr(_config, "DEFAULT_ENVIRONMENT_KEY", None)
-        or f"{resolved_project_key}_default"
-        if resolved_project_key
-        else None
+        or _config.DEFAULT_ENVIRONMENT_KEY
+        or (f"{resolved_project_key}_default" if resolved_project_key else None)
     )
 
     # Resolve run_id
-    resolved_run_id = (
-        run_id or os.getenv("run_id") or getattr(_config, "DEFAULT_RUN_ID", None)
-    )
+    resolved_run_id = run_id or os.getenv("run_id") or _config.DEFAULT_RUN_ID
 
     # Convert run_id to string if it exists
     if resolved_run_id is not None:
         resolved_run_id = str(resolved_run_id)
 
+    _apply_init(
+        resolved_token,
+        resolved_project_key,
+        resolved_env_key,
+        resolved_run_id,
+        check_credits=check_credits,
+        pool_size=pool_size,
+    )
+
+
+def init_from_config(
+    config: dict,
+    check_credits: bool = False,
+    pool_size: Optional[int] = None,
+) -> None:
+    """
+    Initialize from an explicit mapping, without reading .env or environment variables.
+
+    For hot paths (serverless handlers, per-task workers) that already hold the
+    credentials. Keys: "uid" (or "token"), "project_key", and optionally
+    "environment_key" (defaults to "<project_key>_default") and "run_id".
+    """
+    project_key = config.get("project_key")
+    environment_key = config.get("environment_key") or (
+        f"{project_key}_default" if project_key else None
+    )
+    run_id = config.get("run_id")
+    _apply_init(
+        config.get("uid") or config.get("token"),
+        project_key,
+        environment_key,
+        str(run_id) if run_id is not None else None,
+        check_credits=check_credits,
+        pool_size=pool_size,
+    )
+
+
+def _apply_init(
+    resolved_token: Optional[str],
+    resolved_project_key: Optional[str],
+    resolved_env_key: Optional[str],
+    resolved_run_id: Optional[str],
+    check_credits: bool = False,
+    pool_size: Optional[int] = None,
+) -> None:
+    """Validate resolved credentials and install them (shared by init and init_from_config)."""
     # Validate critical keys
     if not resolved_token:
         raise ValueError(
@@ -130,6 +208,10 @@ def init(
     _config.ENVIRONMENT_KEY = resolved_env_key
     _config.RUN_ID = resolved_run_id
 
+    # Size the shared backend connection pool (defaults suit most workflows)
+    if pool_size is not None:
+        configure_http_session(pool_size)
+
     # Check credits if requested
     if check_credits:
         credits_available = str(fetch_data("credits_available", default="1"))
@@ -154,102 +236,308 @@ def set_default_environment_key(key: str) -> None:
     _config.DEFAULT_ENVIRONMENT_KEY = key
 
 
+def _require_init() -> None:
+    if not _config.LOGIN_TOKEN or not _config.PROJECT_KEY:
+        raise RuntimeError(
+            "WaveAssist is not initialized. Please call waveassist.init(...) first."
+        )
+
+
+def _key_params(key: str, run_based: bool) -> dict:
+    """The credential, key and run fields shared by set_data_for_key and fetch_data_for_key."""
+    _require_init()
+    params = {
+        "uid": _config.LOGIN_TOKEN,
+        "project_key": _config.PROJECT_KEY,
+        "data_key": str(key),
+        "environment_key": _config.ENVIRONMENT_KEY,
+        "run_based": "1" if run_based else "0",
+    }
+    # Add run_id if run_based is True and run_id is set
+    if run_based and _config.RUN_ID:
+        params["run_id"] = str(_config.RUN_ID)
+    return params
+
+
 # Supported storage data types
 StoreDataType = Literal["string", "json", "dataframe"]
 
+# Wire encodings for DataFrames: JSON records, or a base64 Arrow IPC stream / Parquet file
+DataFrameFormat = Literal["records", "arrow", "parquet"]
+_DATAFRAME_FORMATS = ("records", "arrow", "parquet")
 
-def store_data(
-    key: str,
-    data: Any,
-    run_based: bool = False,
-    data_type: Optional[StoreDataType] = None,
-):
+
+def _df_to_records(df: pd.DataFrame) -> list:
+    """JSON-ready records for `df`, matching json.loads(df.to_json(orient="records",
+    date_format="iso")) without encoding the frame to a string and parsing it back.
+
+    Handles the common column types directly (numbers, bools, strings,
+    datetimes); anything else takes the to_json round-trip.
     """
-    Serialize the data based on its type and store it in the WaveAssist backend.
+    if len(df.columns) == 0 or not df.columns.is_unique:
+        return _json_loads(df.to_json(orient="records", date_format="iso"))
+
+    keys = []
+    columns = []
+    for name, col in df.items():
+        dtype = col.dtype
+        kind = dtype.kind
+        if kind == "M":
+            # Same ISO-8601 millisecond format to_json writes; tz-aware values as UTC "Z"
+            tz = getattr(dtype, "tz", None)
+            if tz is not None:
+                col = col.dt.tz_convert("UTC").dt.tz_localize(None)
+            text = np.datetime_as_string(col.to_numpy(), unit="ms").astype(object)
+            if tz is not None:
+                text = text + "Z"
+            text[col.isna().to_numpy()] = None
+            values = text.tolist()
+        elif not isinstance(dtype, np.dtype) and (kind in "biu" or (kind == "f" and dtype.itemsize == 8)):
+            # Nullable Int64 / boolean / Float64: pd.NA (and inf) go out as null, as to_json writes them
+            valid = col.notna().to_numpy()
+            if kind == "f":
+                valid = valid & np.isfinite(col.to_numpy(dtype="float64", na_value=np.nan))
+            values = col.astype(object).where(valid, None).tolist()
+        elif kind in "biu":
+            values = col.tolist()
+        elif kind == "f" and dtype.itemsize == 8:
+            finite = np.isfinite(col.to_numpy())
+            # Only columns that hold NaN/inf pay for the object copy that turns them into None
+            values = col.tolist() if finite.all() else col.astype(object).where(finite, None).tolist()
+        elif (
+            pd.api.types.is_string_dtype(dtype)
+            and pd.api.types.infer_dtype(col, skipna=True) in ("string", "empty")
+        ):
+            missing = col.isna()
+            values = col.astype(object).where(~missing, None).tolist() if missing.any() else col.tolist()
+        else:
+            # timedeltas, categoricals, float32, mixed/other objects: let pandas encode them
+            return _json_loads(df.to_json(orient="records", date_format="iso"))
+        keys.append(str(name))
+        columns.append(values)
+    return [dict(zip(keys, row)) for row in zip(*columns)]
 
-    Args:
-        key: Storage key.
-        data: Value to store (DataFrame, dict, list, or stringable).
-        run_based: If True, scope storage to the current run_id.
-        data_type: Optional explicit type ("string", "json", "dataframe").
-                   If not set, type is inferred from data. When set, data is
-                   normalized to that type before storing.
 
-    Returns:
-        True if store succeeded, False otherwise.
+def _df_dtypes(df: pd.DataFrame) -> Optional[dict]:
+    """{column: dtype name} sidecar stored next to dataframe records, or None if ambiguous."""
+    if not df.columns.is_unique:
+        return None
+    dtypes = {str(name): str(dtype) for name, dtype in df.dtypes.items()}
+    return dtypes if len(dtypes) == len(df.columns) else None
+
+
+def _string_dtype(dtype_name: str):
+    """Target for a stored "str"/"string" column, rather than pandas_dtype()'s per-version guess.
+
+    "string" is always StringDtype (missing values as pd.NA). "str" is the NaN-backed default
+    string dtype where pandas has one (2.3+) and None elsewhere, keeping the object column the
+    records give; numpy's "<U" would turn missing values into the text "None".
     """
-    if not _config.LOGIN_TOKEN or not _config.PROJECT_KEY:
-        raise RuntimeError(
-            "WaveAssist is not initialized. Please call waveassist.init(...) first."
+    if dtype_name == "string":
+        return pd.StringDtype()
+    try:
+        return pd.StringDtype(na_value=np.nan)
+    except TypeError:  # pandas < 2.3
+        return None
+
+
+def _restore_dtypes(df: pd.DataFrame, dtypes: dict) -> pd.DataFrame:
+    """Re-apply a stored dtypes sidecar to a frame rebuilt from records.
+
+    Datetime columns are parsed back from their ISO strings; other columns are
+    cast only where pandas inferred something different. A column that can't
+    be converted keeps its inferred dtype.
+    """
+    for name, dtype_name in dtypes.items():
+        if name not in df.columns or str(df[name].dtype) == dtype_name:
+            continue
+        try:
+            if dtype_name in ("str", "string"):
+                target = _string_dtype(dtype_name)
+                if target is not None:
+                    df[name] = df[name].astype(target)
+                continue
+            target = pd.api.types.pandas_dtype(dtype_name)
+            if target.kind == "m":
+                continue  # stored as to_json's epoch integers, not round-trippable here
+            if target.kind == "M":
+                tz = getattr(target, "tz", None)
+                parsed = pd.to_datetime(df[name], errors="coerce", utc=tz is not None)
+                if tz is not None:
+                    parsed = parsed.dt.tz_convert(tz)
+                df[name] = parsed.astype(target)
+            else:
+                df[name] = df[name].astype(target)
+        except (TypeError, ValueError):
+            logger.debug("Could not restore dtype %s for column %r", dtype_name, name)
+    return df
+
+
+def _df_to_arrow(df: pd.DataFrame) -> str:
+    """Base64 Arrow IPC stream of `df` (index dropped, like records)."""
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return base64.b64encode(sink.getvalue().to_pybytes()).decode("ascii")
+
+
+def _df_from_arrow(encoded: str) -> pd.DataFrame:
+    import pyarrow as pa
+
+    with pa.ipc.open_stream(base64.b64decode(encoded)) as reader:
+        return reader.read_all().to_pandas()
+
+
+def _df_to_parquet(df: pd.DataFrame) -> str:
+    """Base64 zstd-compressed Parquet file of `df` (index dropped, like records)."""
+    buf = io.BytesIO()
+    df.to_parquet(buf, engine="pyarrow", compression="zstd", index=False)
+    return base64.b64encode(buf.getvalue()).decode("ascii")
+
+
+def _df_from_parquet(encoded: str) -> pd.DataFrame:
+    return pd.read_parquet(io.BytesIO(base64.b64decode(encoded)), engine="pyarrow")
+
+
+_DATAFRAME_ENCODERS = {"arrow": _df_to_arrow, "parquet": _df_to_parquet}
+_DATAFRAME_DECODERS = {"arrow": _df_from_arrow, "parquet": _df_from_parquet}
+
+
+def _serialize_dataframe(df: pd.DataFrame, data_format: DataFrameFormat) -> tuple:
+    """(serialized data, encoding) for a dataframe store; encoding None means JSON records.
+
+    Falls back to records when pyarrow is missing or can't encode the frame
+    (e.g. mixed-type object columns).
+    """
+    encoder = _DATAFRAME_ENCODERS.get(data_format)
+    if encoder is not None:
+        try:
+            return encoder(df), data_format
+        except ImportError:
+            logger.warning(
+                "data_format=%r needs pyarrow (pip install waveassist[arrow]); sending records", data_format
+            )
+        except (TypeError, ValueError) as e:
+            logger.warning("Could not %s-encode DataFrame (%s); sending records", data_format, e)
+    return _df_to_records(df), None
+
+
+def _as_text(data: Any) -> str:
+    """Text form of a value stored as a string: str as-is, bytes decoded as UTF-8 (not their repr)."""
+    if isinstance(data, str):
+        return data
+    if isinstance(data, (bytes, bytearray)):
+        return data.decode("utf-8", errors="replace")
+    return str(data)
+
+
+def _store_payload(
+    key: str,
+    data: Any,
+    run_based: bool,
+    data_type: Optional[StoreDataType],
+    data_format: DataFrameFormat = "records",
+) -> dict:
+    """Serialize `data` and build the set_data_for_key request body (shared with waveassist.aio)."""
+    payload = _key_params(key, run_based)
+    if data_format not in _DATAFRAME_FORMATS:
+        raise ValueError(
+            f"Unsupported data_format {data_format!r}; expected one of {_DATAFRAME_FORMATS}."
         )
 
     format: str
     serialized_data: Any
+    encoding: Optional[str] = None
 
     if data_type is not None:
         # Caller requested a specific type: normalize data to that type
         if data_type == "dataframe":
             if isinstance(data, pd.DataFrame):
-                serialized_data = json.loads(
-                    data.to_json(orient="records", date_format="iso")
-                )
+                serialized_data, encoding = _serialize_dataframe(data, data_format)
             elif isinstance(data, (list, dict)):
-                serialized_data = pd.DataFrame(data).to_dict(orient="records")
+                serialized_data = _df_to_records(pd.DataFrame(data))
             else:
-                serialized_data = pd.DataFrame([{"value": data}]).to_dict(
-                    orient="records"
-                )
+                serialized_data = _df_to_records(pd.DataFrame([{"value": data}]))
             format = "dataframe"
         elif data_type == "json":
             if isinstance(data, (dict, list)):
                 serialized_data = data
             elif isinstance(data, pd.DataFrame):
-                serialized_data = json.loads(
-                    data.to_json(orient="records", date_format="iso")
-                )
+                serialized_data = _df_to_records(data)
             else:
-                serialized_data = {"value": str(data)}
+                serialized_data = {"value": _as_text(data)}
             # Ensure JSON-serializable
-            json.dumps(serialized_data)
+            _json_dumps(serialized_data)
             format = "json"
         else:  # "string"
-            serialized_data = str(data)
+            serialized_data = _as_text(data)
             format = "string"
     else:
         # Infer type from data and ensure correct serialization
         if isinstance(data, pd.DataFrame):
             format = "dataframe"
-            serialized_data = json.loads(
-                data.to_json(orient="records", date_format="iso")
-            )
+            serialized_data, encoding = _serialize_dataframe(data, data_format)
         elif isinstance(data, (dict, list)):
             format = "json"
             try:
-                json.dumps(data)
+                _json_dumps(data)
                 serialized_data = data
             except (TypeError, ValueError):
                 serialized_data = str(data)
                 format = "string"
         else:
             format = "string"
-            serialized_data = str(data)
+            serialized_data = _as_text(data)
 
-    payload = {
-        "uid": _config.LOGIN_TOKEN,
-        "data_type": format,
-        "data": serialized_data,
-        "project_key": _config.PROJECT_KEY,
-        "data_key": str(key),
-        "environment_key": _config.ENVIRONMENT_KEY,
-        "run_based": "1" if run_based else "0",
-    }
+    payload["data_type"] = format
+    payload["data"] = serialized_data
 
-    # Add run_id to payload if run_based is True and run_id is set
-    if run_based and _config.RUN_ID:
-        payload["run_id"] = str(_config.RUN_ID)
+    if encoding is not None:
+        payload["encoding"] = encoding
+    # Column dtypes, so fetch_data can rebuild the frame without re-inferring them
+    # (Arrow and Parquet carry their own schema)
+    elif format == "dataframe" and isinstance(data, pd.DataFrame):
+        dtypes = _df_dtypes(data)
+        if dtypes:
+            payload["dtypes"] = dtypes
+
+    return payload
+
+
+def store_data(
+    key: str,
+    data: Any,
+    run_based: bool = False,
+    data_type: Optional[StoreDataType] = None,
+    data_format: DataFrameFormat = "records",
+):
+    """
+    Serialize the data based on its type and store it in the WaveAssist backend.
+
+    Args:
+        key: Storage key.
+        data: Value to store (DataFrame, dict, list, or stringable).
+        run_based: If True, scope storage to the current run_id.
+        data_type: Optional explicit type ("string", "json", "dataframe").
+                   If not set, type is inferred from data. When set, data is
+                   normalized to that type before storing.
+        data_format: Wire encoding for DataFrames. "records" (default) sends
+                   JSON rows; "arrow" sends a compact Arrow IPC stream and
+                   "parquet" a zstd-compressed Parquet file (both need pyarrow
+                   and fall back to records without it). fetch_data decodes
+                   any of them.
+
+    Returns:
+        True if store succeeded, False otherwise.
+    """
+    payload = _store_payload(key, data, run_based, data_type, data_format)
 
     path = "data/set_data_for_key/"
     success, response = call_post_api(path, payload)
+    invalidate_cache(key)
 
     if not success:
         logger.error("Error storing data: %s", response)
@@ -257,48 +545,51 @@ def store_data(
     return success
 
 
-def fetch_data(
-    key: str,
+# store_data_many: stores in flight at once (well under the default HTTP pool size)
+STORE_MANY_MAX_WORKERS = 8
+
+
+def store_data_many(
+    items: Dict[str, Any],
     run_based: bool = False,
-    default: Any = None,
-):
+    data_type: Optional[StoreDataType] = None,
+    data_format: DataFrameFormat = "records",
+    max_workers: int = STORE_MANY_MAX_WORKERS,
+) -> Dict[str, bool]:
     """
-    Retrieve the data stored under `key` from the WaveAssist backend.
+    Store several keys at once: store_data() for each {key: data} item, sent in parallel
+    over the shared keep-alive session.
 
-    Args:
-        key: Storage key.
-        run_based: If True, scope lookup to the current run_id.
-        default: Value to return when the key is missing, API fails, or
-                  the stored type is unsupported/invalid. Not used when
-                  the key exists and deserialization succeeds.
+    Every value is serialized before anything is sent, so a bad value or an
+    uninitialized SDK raises without storing any of the items.
 
     Returns:
-        Deserialized data (DataFrame, dict, list, or str) matching the
-        stored data_type. Returns `default` on failure or missing key.
+        {key: True if that store succeeded} in the order given.
     """
-    if not _config.LOGIN_TOKEN or not _config.PROJECT_KEY:
-        raise RuntimeError(
-            "WaveAssist is not initialized. Please call waveassist.init(...) first."
-        )
+    payloads = {key: _store_payload(key, data, run_based, data_type, data_format) for key, data in items.items()}
+    if not payloads:
+        return {}
 
-    params = {
-        "uid": _config.LOGIN_TOKEN,
-        "project_key": _config.PROJECT_KEY,
-        "data_key": str(key),
-        "environment_key": _config.ENVIRONMENT_KEY,
-        "run_based": "1" if run_based else "0",
-    }
+    def _one(key: str) -> bool:
+        success, response = call_post_api("data/set_data_for_key/", payloads[key])
+        if not success:
+            logger.error("Error storing data for key '%s': %s", key, response)
+        return success
 
-    # Add run_id to params if run_based is True and run_id is set
-    if run_based and _config.RUN_ID:
-        params["run_id"] = str(_config.RUN_ID)
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(payloads))) as pool:
+        results = dict(zip(payloads, pool.map(_one, payloads)))
+    for key in payloads:
+        invalidate_cache(key)
+    return results
 
-    path = "data/fetch_data_for_key/"
-    success, response = call_get_api(path, params)
 
-    if not success:
-        return default
+def _fetch_params(key: str, run_based: bool) -> dict:
+    """Build the fetch_data_for_key query params (shared with waveassist.aio)."""
+    return _key_params(key, run_based)
 
+
+def _deserialize_fetched(key: str, response: dict, default: Any) -> Any:
+    """Turn a fetch_data_for_key response into the stored Python value, or `default`."""
     try:
         # Extract stored format and already-deserialized data
         data_type = response.get("data_type")
@@ -313,8 +604,20 @@ def fetch_data(
                 return default
             if isinstance(data, pd.DataFrame):
                 return data
+            decoder = _DATAFRAME_DECODERS.get(response.get("encoding"))
+            if decoder is not None and isinstance(data, str):
+                return decoder(data)
             if isinstance(data, list):
-                return pd.DataFrame(data)
+                dtypes = response.get("dtypes")
+                if not isinstance(dtypes, dict):
+                    return pd.DataFrame(data)
+                if data and isinstance(data[0], dict) and data[0].keys() == dtypes.keys():
+                    # Columns known up front from the sidecar: from_records skips collecting
+                    # the key union across every row, which DataFrame(records) has to do.
+                    df = pd.DataFrame.from_records(data, columns=list(dtypes))
+                else:
+                    df = pd.DataFrame(data)
+                return _restore_dtypes(df, dtypes)
             if isinstance(data, dict):
                 return pd.DataFrame([data])
             return pd.DataFrame({"value": [data]})
@@ -336,6 +639,72 @@ def fetch_data(
         logger.error("fetch_data: unexpected error deserializing key '%s'", key, exc_info=True)
         return default
 
+
+# fetch_data(cache_ttl=...) results: (project, environment, key, run_based, run_id) -> (stored_at, value)
+_FETCH_CACHE: dict = {}
+_MISSING = object()
+
+
+def _fetch_cache_key(key: str, run_based: bool) -> tuple:
+    run_id = str(_config.RUN_ID) if run_based and _config.RUN_ID else None
+    return (_config.PROJECT_KEY, _config.ENVIRONMENT_KEY, str(key), run_based, run_id)
+
+
+def invalidate_cache(key: Optional[str] = None) -> None:
+    """Drop cached fetch_data values: all of them, or just those for `key`."""
+    if key is None:
+        _FETCH_CACHE.clear()
+        return
+    for cache_key in [k for k in _FETCH_CACHE if k[2] == str(key)]:
+        _FETCH_CACHE.pop(cache_key, None)
+
+
+def fetch_data(
+    key: str,
+    run_based: bool = False,
+    default: Any = None,
+    cache_ttl: float = 0,
+):
+    """
+    Retrieve the data stored under `key` from the WaveAssist backend.
+
+    Args:
+        key: Storage key.
+        run_based: If True, scope lookup to the current run_id.
+        default: Value to return when the key is missing, API fails, or
+                  the stored type is unsupported/invalid. Not used when
+                  the key exists and deserialization succeeds.
+        cache_ttl: Seconds to reuse a previously fetched value from this
+                   process instead of calling the backend (0 = always fetch).
+                   store_data and invalidate_cache() drop cached values.
+
+    Returns:
+        Deserialized data (DataFrame, dict, list, or str) matching the
+        stored data_type. Returns `default` on failure or missing key.
+    """
+    params = _fetch_params(key, run_based)
+
+    if cache_ttl > 0:
+        cache_key = _fetch_cache_key(key, run_based)
+        hit = _FETCH_CACHE.get(cache_key)
+        if hit is not None and time.monotonic() - hit[0] < cache_ttl:
+            # Copy so callers can't mutate the cached value
+            return copy.deepcopy(hit[1])
+
+    path = "data/fetch_data_for_key/"
+    success, response = call_get_api(path, params)
+
+    if not success:
+        return default
+
+    value = _deserialize_fetched(key, response, _MISSING)
+    if value is _MISSING:
+        return default
+    if cache_ttl > 0:
+        _FETCH_CACHE[cache_key] = (time.monotonic(), copy.deepcopy(value))
+    return value
+
+
 def publish_dashboard(
     html_content: str,
     data_key: str = "dashboard_html",
@@ -352,10 +721,7 @@ def publish_dashboard(
     Returns:
         The public URL string, or None on failure.
     """
-    if not _config.LOGIN_TOKEN or not _config.PROJECT_KEY:
-        raise RuntimeError(
-            "WaveAssist is not initialized. Please call waveassist.init(...) first."
-        )
+    _require_init()
 
     stored = store_data(data_key, html_content, run_based=run_based, data_type="string")
     if not stored:
@@ -444,19 +810,18 @@ def send_email(
         ValueError: If validation fails (empty subject/html, invalid attachment).
         RuntimeError: If API fails and raise_on_failure=True.
     """
-    if not _config.LOGIN_TOKEN or not _config.PROJECT_KEY:
-        raise RuntimeError(
-            "WaveAssist is not initialized. Please call waveassist.init(...) first."
-        )
+    _require_init()
 
     # Input validation
-    subject_clean = (subject or "").strip()
-    if not subject_clean:
+    # isspace() rejects blank input without building a stripped copy; strip() then
+    # returns the same object unless there is surrounding whitespace to drop.
+    if not subject or subject.isspace():
         err = "Subject cannot be empty."
         if raise_on_failure:
             raise ValueError(err)
         logger.error("%s", err)
         return False
+    subject_clean = subject.strip()
     if len(subject_clean) > _SEND_EMAIL_SUBJECT_MAX_LENGTH:
         err = f"Subject too long (max {_SEND_EMAIL_SUBJECT_MAX_LENGTH} chars)."
         if raise_on_failure:
@@ -464,13 +829,13 @@ def send_email(
         logger.error("%s", err)
         return False
 
-    html_clean = (html_content or "").strip()
-    if not html_clean:
+    if not html_content or html_content.isspace():
         err = "HTML content cannot be empty."
         if raise_on_failure:
             raise ValueError(err)
         logger.error("%s", err)
         return False
+    html_clean = html_content.strip()
     if len(html_clean) > _SEND_EMAIL_HTML_MAX_LENGTH:
         err = f"HTML content too long (max {_SEND_EMAIL_HTML_MAX_LENGTH} chars)."
         if raise_on_failure:
@@ -511,13 +876,23 @@ def send_email(
     response_msg = None
     max_attempts = 2
 
+    # The first attempt consumes the attachment; rewind it before a retry.
+    rewind_to = None
+    if attachment_file is not None and callable(getattr(attachment_file, "seek", None)):
+        try:
+            rewind_to = attachment_file.tell()
+        except (OSError, ValueError, AttributeError):
+            rewind_to = None
+
     for attempt in range(max_attempts):
+        if attempt and rewind_to is not None:
+            attachment_file.seek(rewind_to)
         success, response = call_post_api_with_files(path, data, files=files)
         if success:
             break
         response_msg = response if isinstance(response, str) else str(response)
         if attempt < max_attempts - 1:
-            time.sleep(1)
+            time.sleep(_backoff(attempt))
 
     if not success:
         logger.error("Error sending email: %s", response_msg)
@@ -530,10 +905,7 @@ def send_email(
 
 def fetch_openrouter_credits():
     """Fetch the credit balance for the current project."""
-    if not _config.LOGIN_TOKEN or not _config.PROJECT_KEY:
-        raise RuntimeError(
-            "WaveAssist is not initialized. Please call waveassist.init(...) first."
-        )
+    _require_init()
     path = "/fetch_openrouter_credits/" + _config.LOGIN_TOKEN
     success, response = call_get_api(path, {})
     if not success:
@@ -550,10 +922,7 @@ def check_credits_and_notify(
     Check OpenRouter credits via account-level cache and send a one-time notification
     email if insufficient credits are available. Email is sent server-side.
     """
-    if not _config.LOGIN_TOKEN or not _config.PROJECT_KEY:
-        raise RuntimeError(
-            "WaveAssist is not initialized. Please call waveassist.init(...) first."
-        )
+    _require_init()
 
     success, response = call_post_api(
         "sdk/check_account_credits/",
@@ -621,7 +990,7 @@ def _parse_claude_cli_result(result, response_model: Type[T], model: str) -> T:
     if result.returncode != 0:
         raise RuntimeError(f"Claude CLI failed: {result.stderr}")
 
-    cli_output = json.loads(result.stdout)
+    cli_output = _json_loads(result.stdout)
     content = cli_output.get("result", result.stdout.strip())
     return parse_json_response(content, response_model, model)
 
@@ -676,7 +1045,7 @@ def _call_llm_claude_cli(
         return _parse_claude_cli_result(result, response_model, model)
 
     # Headless auth: explicit registry token wins, else the account's setup-token Variable.
-    token = setup_token or fetch_data(CLAUDE_SETUP_TOKEN_STORED_DATA_KEY)
+    token = setup_token or fetch_data(CLAUDE_SETUP_TOKEN_STORED_DATA_KEY, cache_ttl=LLM_CONFIG_CACHE_TTL)
     if not token:
         raise ValueError(
             "Claude setup token not found. Generate one with `claude setup-token` "
@@ -714,12 +1083,27 @@ def _resolve_llm_provider() -> str:
     """
     provider = (
         os.environ.get("LLM_PROVIDER")
-        or fetch_data(LLM_PROVIDER_STORED_DATA_KEY)
+        or fetch_data(LLM_PROVIDER_STORED_DATA_KEY, cache_ttl=LLM_CONFIG_CACHE_TTL)
         or PROVIDER_OPENROUTER
     )
     return str(provider).strip().lower()
 
 
+@lru_cache(maxsize=16)
+def _cached_client(client_cls: type, api_key: str, base_url: str) -> OpenAI:
+    return client_cls(
+        api_key=api_key,
+        base_url=base_url,
+        timeout=LLM_REQUEST_TIMEOUT,
+        max_retries=LLM_CLIENT_MAX_RETRIES,
+    )
+
+
+def _openai_client(api_key: str, base_url: str) -> OpenAI:
+    """One OpenAI client (and its connection pool) per key/endpoint, reused across calls."""
+    return _cached_client(OpenAI, api_key, base_url)
+
+
 def _resolve_llm_client(provider: str, kwargs: dict) -> OpenAI:
     """Build the OpenAI-compatible client for a hosted provider.
 
@@ -728,7 +1112,7 @@ def _resolve_llm_client(provider: str, kwargs: dict) -> OpenAI:
     call_llm and never reaches here.
     """
     if provider == PROVIDER_AZURE:
-        config = fetch_data(AZURE_OPENAI_CONFIG_STORED_DATA_KEY)
+        config = fetch_data(AZURE_OPENAI_CONFIG_STORED_DATA_KEY, cache_ttl=LLM_CONFIG_CACHE_TTL)
         # fetch_data may wrap a stored value in a list; unwrap to the dict.
         if isinstance(config, list):
             config = config[0] if config else None
@@ -742,15 +1126,15 @@ def _resolve_llm_client(provider: str, kwargs: dict) -> OpenAI:
         # Newer Azure models require max_completion_tokens instead of max_tokens.
         if "max_tokens" in kwargs and "max_completion_tokens" not in kwargs:
             kwargs["max_completion_tokens"] = kwargs.pop("max_tokens")
-        return OpenAI(api_key=config["api_key"], base_url=base_url)
+        return _openai_client(config["api_key"], base_url)
 
     # Default: OpenRouter
-    api_key = fetch_data(OPENROUTER_API_STORED_DATA_KEY)
+    api_key = fetch_data(OPENROUTER_API_STORED_DATA_KEY, cache_ttl=LLM_CONFIG_CACHE_TTL)
     if not api_key:
         raise ValueError(
             "OpenRouter API key not found. Please store it using waveassist.store_data('open_router_key', 'your_api_key')"
         )
-    return OpenAI(api_key=api_key, base_url=OPENROUTER_URL)
+    return _openai_client(api_key, OPENROUTER_URL)
 
 
 def _azure_api_type(config: dict) -> str:
@@ -819,7 +1203,7 @@ def _call_llm_responses(
             return parse_json_response(response.output_text, response_model, model)
         except Exception as e:
             if attempt < max_attempts - 1:
-                time.sleep(2 ** attempt)
+                time.sleep(_backoff(attempt))
                 continue
             raise RuntimeError(
                 f"LLM API call failed after {max_attempts} attempts: {str(e)}"
@@ -846,7 +1230,7 @@ def _resolve_model_entry(model: str):
     if not _config.LOGIN_TOKEN or not _config.PROJECT_KEY:
         return None
     try:
-        registry = fetch_data(LLM_MODELS_STORED_DATA_KEY)
+        registry = fetch_data(LLM_MODELS_STORED_DATA_KEY, cache_ttl=LLM_CONFIG_CACHE_TTL)
     except Exception:
         return None
     if isinstance(registry, list):
@@ -858,7 +1242,7 @@ def _resolve_model_entry(model: str):
         return None
     cred_ref = entry.get("credential")
     if cred_ref:
-        creds = fetch_data(LLM_CREDENTIALS_STORED_DATA_KEY)
+        creds = fetch_data(LLM_CREDENTIALS_STORED_DATA_KEY, cache_ttl=LLM_CONFIG_CACHE_TTL)
         if isinstance(creds, list):
             creds = creds[0] if creds else {}
         shared = creds.get(cred_ref, {}) if isinstance(creds, dict) else {}
@@ -867,35 +1251,107 @@ def _resolve_model_entry(model: str):
     return dict(entry)
 
 
+@lru_cache(maxsize=256)
+def _supports_json_format(model: str) -> bool:
+    """Whether `model` accepts response_format={"type": "json_object"}; memoized per model name."""
+    name = model.lower()
+    return not any(x in name for x in UNSUPPORTED_JSON_MODELS_ARRAY)
+
+
+@lru_cache(maxsize=256)
+def _supports_structured_output(model: str) -> bool:
+    """Whether `model` takes strict json_schema response formats; memoized per model name."""
+    return model.lower().rsplit("/", 1)[-1].startswith(STRUCTURED_OUTPUT_MODELS)
+
+
+# (model, response_model) pairs whose schema the provider rejected in strict mode
+_STRUCTURED_OUTPUT_REJECTED: set = set()
+
+
+def _is_schema_rejection(error: BadRequestError) -> bool:
+    """Whether a 400 is about the response_format / json_schema itself, as opposed to
+    e.g. a bad sampling kwarg that JSON mode would reject just the same."""
+    text = f"{getattr(error, 'param', None) or ''} {error}".lower()
+    return any(marker in text for marker in ("response_format", "json_schema", "schema"))
+
+
+def _call_llm_structured(client, model, prompt, response_model, kwargs) -> tuple:
+    """One schema-constrained chat.completions.parse call. The SDK derives the strict
+    json_schema from the model, so the prompt needs no embedded JSON template.
+
+    Returns (parsed model or None, raw content or None). Output cut off by the
+    length limit or the content filter comes back unparsed, for the caller to
+    soft-parse like a JSON-mode response.
+    """
+    try:
+        completion = client.chat.completions.parse(
+            model=model,
+            messages=[{"role": "user", "content": prompt}],
+            response_format=response_model,
+            **kwargs
+        )
+    except (LengthFinishReasonError, ContentFilterFinishReasonError) as e:
+        completion = getattr(e, "completion", None)
+        if completion is None:
+            return None, None
+        return None, completion.choices[0].message.content
+    message = completion.choices[0].message
+    return message.parsed, message.content
+
+
 def _call_llm_chat(client, model, prompt, response_model, should_retry, kwargs):
-    """Shared OpenAI-compatible chat.completions path (OpenRouter + Azure chat models): JSON-format
-    response, soft-parse, one transport retry, plus one optional format retry when should_retry."""
+    """Shared OpenAI-compatible chat.completions path (OpenRouter + Azure chat models): structured
+    output for models that support it, else JSON-format response + soft-parse; one transport retry,
+    plus one optional format retry when should_retry."""
     json_prompt = create_json_prompt(prompt, response_model)
+    structured_prompt = prompt
     kwargs.pop("response_format", None)
-    response_format = {"type": "json_object"}
-    if any(x in model.lower() for x in UNSUPPORTED_JSON_MODELS_ARRAY):
-        response_format = None
+    response_format = {"type": "json_object"} if _supports_json_format(model) else None
+    structured = (
+        _supports_structured_output(model)
+        and (model, response_model) not in _STRUCTURED_OUTPUT_REJECTED
+    )
 
     max_attempts = 2
     format_error_retried = False
     for attempt in range(max_attempts):
         try:
-            response = client.chat.completions.create(
-                model=model,
-                messages=[{"role": "user", "content": json_prompt}],
-                response_format=response_format,
-                **kwargs
-            )
-            content = response.choices[0].message.content
+            content = None
+            if structured:
+                try:
+                    parsed, content = _call_llm_structured(
+                        client, model, structured_prompt, response_model, kwargs
+                    )
+                    if parsed is not None:
+                        return parsed
+                except BadRequestError as e:
+                    if not _is_schema_rejection(e):
+                        raise
+                    # Schema not expressible in strict mode (or endpoint without support):
+                    # JSON mode for this call and for later calls with the same pair.
+                    logger.info("Structured output rejected for %s (%s); using JSON mode", model, e)
+                    _STRUCTURED_OUTPUT_REJECTED.add((model, response_model))
+                    structured = False
+                except ValueError as e:
+                    # The SDK could not build the schema or validate the reply against it:
+                    # answer this call in JSON mode, which soft-parses and can format-retry.
+                    logger.info("Structured output unusable for %s (%s); using JSON mode", model, e)
+            if content is None:
+                response = client.chat.completions.create(
+                    model=model,
+                    messages=[{"role": "user", "content": json_prompt}],
+                    response_format=response_format,
+                    **kwargs
+                )
+                content = response.choices[0].message.content
             try:
-                return parse_json_response(content, response_model, model)
+                return parse_json_response(content or "", response_model, model)
             except ValueError:
                 if should_retry and not format_error_retried:
                     format_error_retried = True
-                    json_prompt = create_json_prompt(
-                        prompt + "\n\nIMPORTANT: Your previous response was invalid JSON. You must output ONLY valid JSON matching the schema, with no explanations or other text.",
-                        response_model
-                    )
+                    retry_note = "\n\nIMPORTANT: Your previous response was invalid JSON. You must output ONLY valid JSON matching the schema, with no explanations or other text."
+                    json_prompt = create_json_prompt(prompt + retry_note, response_model)
+                    structured_prompt = prompt + retry_note
                     if 'temperature' not in kwargs:
                         kwargs['temperature'] = 0.2
                     continue
@@ -904,7 +1360,7 @@ def _call_llm_chat(client, model, prompt, response_model, should_retry, kwargs):
             raise
         except Exception as e:
             if attempt < max_attempts - 1:
-                time.sleep(2 ** attempt)
+                time.sleep(_backoff(attempt))
                 continue
             raise RuntimeError(
                 f"LLM API call failed after {max_attempts} attempts: {str(e)}"
@@ -931,7 +1387,7 @@ def _call_llm_via_entry(entry, alias, prompt, response_model, should_retry, kwar
         api_key = entry.get("api_key") or entry.get("token")
         if not api_key or not entry.get("api_base"):
             raise ValueError(f"llm_models['{alias}']: azure requires 'api_base' and 'api_key'.")
-        client = OpenAI(api_key=api_key, base_url=_azure_base(entry["api_base"]))
+        client = _openai_client(api_key, _azure_base(entry["api_base"]))
         if (entry.get("api_type") or "").strip().lower() == AZURE_API_TYPE_RESPONSES:
             return _call_llm_responses(client, model_id, prompt, response_model, kwargs)
         # Newer Azure chat models require max_completion_tokens instead of max_tokens.
@@ -940,12 +1396,12 @@ def _call_llm_via_entry(entry, alias, prompt, response_model, should_retry, kwar
         return _call_llm_chat(client, model_id, prompt, response_model, should_retry, kwargs)
 
     if provider in ("", PROVIDER_OPENROUTER):
-        api_key = entry.get("api_key") or fetch_data(OPENROUTER_API_STORED_DATA_KEY)
+        api_key = entry.get("api_key") or fetch_data(OPENROUTER_API_STORED_DATA_KEY, cache_ttl=LLM_CONFIG_CACHE_TTL)
         if not api_key:
             raise ValueError(
                 f"llm_models['{alias}']: OpenRouter needs an 'api_key' or a stored open_router_key."
             )
-        client = OpenAI(api_key=api_key, base_url=OPENROUTER_URL)
+        client = _openai_client(api_key, OPENROUTER_URL)
         return _call_llm_chat(client, model_id, prompt, response_model, should_retry, kwargs)
 
     raise ValueError(f"llm_models['{alias}']: unknown provider '{provider}'.")
@@ -957,6 +1413,8 @@ def call_llm(
     response_model: Type[T],
     should_retry: bool = False,
     claude_cli_args=None,
+    cache: Optional[Literal["exact"]] = None,
+    cache_ttl: float = LLM_RESPONSE_CACHE_TTL,
     **kwargs
 ) -> T:
     """
@@ -969,7 +1427,13 @@ def call_llm(
         response_model: A Pydantic model class that defines the structure of the response
         should_retry: If True, will retry once for format/JSON errors. Defaults to False.
                      Transport errors (network, 5xx, 429, timeouts) are always retried once.
-        **kwargs: Additional arguments to pass to the chat completion call (e.g., max_tokens, extra_body)
+        cache: "exact" reuses the parsed response of an earlier identical call (same
+               model, prompt, response_model schema and kwargs) from a local SQLite
+               cache (~/.waveassist/llm_cache.db, or $WAVEASSIST_LLM_CACHE_PATH).
+               Off by default.
+        cache_ttl: Seconds a cached response stays valid. Defaults to 24 hours.
+        **kwargs: Additional arguments to pass to the chat completion call (e.g., max_tokens, extra_body,
+                  timeout in seconds; requests time out after 300s by default)
     
     Returns:
         An instance of the response_model with structured data from the LLM
@@ -993,6 +1457,25 @@ def call_llm(
             max_tokens=3000,
             extra_body={"web_search_options": {"search_context_size": "medium"}})
     """
+    if cache is not None:
+        if cache != "exact":
+            raise ValueError(f"Unsupported call_llm cache mode {cache!r}; use cache='exact'.")
+        call_kwargs = dict(kwargs, claude_cli_args=claude_cli_args) if claude_cli_args else kwargs
+        key = _llm_cache.make_key(
+            _config.PROJECT_KEY, model, prompt, response_model.model_json_schema(), call_kwargs
+        )
+        cached = _llm_cache.get(key, cache_ttl)
+        if cached is not None:
+            try:
+                result = response_model.model_validate_json(cached)
+                logger.debug("llm cache hit key=%s", key)
+                return result
+            except ValueError:
+                logger.debug("llm cache entry no longer matches %s; refetching", response_model.__name__)
+        result = call_llm(model, prompt, response_model, should_retry, claude_cli_args, **kwargs)
+        _llm_cache.put(key, result.model_dump_json(), cache_ttl)
+        return result
+
     # 1) Explicit env override (local dev) wins globally: route to the Claude CLI.
     env_provider = (os.environ.get("LLM_PROVIDER") or "").strip().lower()
     if env_provider in (PROVIDER_CLAUDE_CLI, PROVIDER_CLAUDE_CLI_TOKEN):
@@ -1022,10 +1505,7 @@ def call_llm(
             **kwargs,
         )
 
-    if not _config.LOGIN_TOKEN or not _config.PROJECT_KEY:
-        raise RuntimeError(
-            "WaveAssist is not initialized. Please call waveassist.init(...) first."
-        )
+    _require_init()
 
     # Build the OpenAI-compatible client for the configured hosted provider.
     client = _resolve_llm_client(provider, kwargs)
@@ -1033,7 +1513,7 @@ def call_llm(
     # Azure reasoning / "pro" models route through the Responses API instead of
     # chat.completions, selected explicitly via azure_openai_config["api_type"].
     if provider == PROVIDER_AZURE:
-        azure_config = fetch_data(AZURE_OPENAI_CONFIG_STORED_DATA_KEY)
+        azure_config = fetch_data(AZURE_OPENAI_CONFIG_STORED_DATA_KEY, cache_ttl=LLM_CONFIG_CACHE_TTL)
         if isinstance(azure_config, list):
             azure_config = azure_config[0] if azure_config else {}
         if _azure_api_type(azure_config or {}) == AZURE_API_TYPE_RESPONSES:
@@ -1065,10 +1545,7 @@ _IS_TEST_RUN_KEY = "_is_test_run"
 
 def is_test_run() -> bool:
     """Return True if the current run is a dry/test run. Backend sets this via store_data."""
-    if not _config.LOGIN_TOKEN or not _config.PROJECT_KEY:
-        raise RuntimeError(
-            "WaveAssist is not initialized. Please call waveassist.init(...) first."
-        )
+    _require_init()
     flag = fetch_data(_IS_TEST_RUN_KEY, default=False)
     # fetch_data wraps scalar JSON values in a list — unwrap if needed.
     if isinstance(flag, list):
@@ -0,0 +1,92 @@
+"""
+Local SQLite cache of parsed call_llm responses, used by call_llm(cache="exact").
+
+Entries are keyed on a hash of everything that shapes the response (project,
+model, prompt, response schema, call kwargs) and expire after a TTL; each write
+deletes expired rows, so the file doesn't grow without bound. The cache
+is best-effort: any SQLite error is logged and treated as a miss, so it can
+never make call_llm fail.
+"""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+from waveassist.constants import LLM_RESPONSE_CACHE_TTL
+
+logger = logging.getLogger("waveassist")
+
+_lock = threading.Lock()
+_conn: Optional[sqlite3.Connection] = None
+_conn_path: Optional[str] = None
+
+
+def cache_path() -> str:
+    return os.getenv("WAVEASSIST_LLM_CACHE_PATH") or str(Path.home() / ".waveassist" / "llm_cache.db")
+
+
+def make_key(project_key, model: str, prompt: str, schema: dict, kwargs: dict) -> str:
+    payload = {"pk": project_key, "m": model, "p": prompt, "s": schema, "k": kwargs}
+    return hashlib.sha256(
+        json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()
+
+
+def _connection() -> sqlite3.Connection:
+    """Open (once per path) the cache DB; callers hold _lock."""
+    global _conn, _conn_path
+    path = cache_path()
+    if _conn is None or _conn_path != path:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(path, check_same_thread=False)
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            "key TEXT PRIMARY KEY, response TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_created_at ON llm_cache (created_at)")
+        conn.commit()
+        if _conn is not None:
+            _conn.close()
+        _conn, _conn_path = conn, path
+    return _conn
+
+
+def get(key: str, ttl: float) -> Optional[str]:
+    """Return the cached response JSON for `key` if younger than `ttl` seconds."""
+    try:
+        with _lock:
+            row = _connection().execute(
+                "SELECT response FROM llm_cache WHERE key = ? AND created_at > ?",
+                (key, time.time() - ttl),
+            ).fetchone()
+    except (sqlite3.Error, OSError) as e:
+        logger.warning("LLM cache read failed: %s", e)
+        return None
+    return row[0] if row else None
+
+
+def put(key: str, response_json: str, ttl: float = LLM_RESPONSE_CACHE_TTL) -> None:
+    """Store `response_json` under `key` and drop rows past both `ttl` and the default TTL.
+
+    The default is a floor, so a call with a short cache_ttl doesn't evict
+    entries other calls still read with the (longer) default.
+    """
+    now = time.time()
+    try:
+        with _lock:
+            conn = _connection()
+            conn.execute(
+                "DELETE FROM llm_cache WHERE created_at <= ?", (now - max(ttl, LLM_RESPONSE_CACHE_TTL),)
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, response, created_at) VALUES (?, ?, ?)",
+                (key, response_json, now),
+            )
+            conn.commit()
+    except (sqlite3.Error, OSError) as e:
+        logger.warning("LLM cache write failed: %s", e)
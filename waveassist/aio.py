@@ -0,0 +1,161 @@
+"""
+Asyncio variants of the data helpers and call_llm.
+
+    import waveassist
+    from waveassist import aio
+
+    waveassist.init()
+    users, orders = (await aio.fetch_many(["users", "orders"])).values()
+    await aio.astore_data("summary", {"users": len(users)})
+
+Same arguments, return values and never-crash behaviour as the sync
+functions; init() is shared. Backend calls go through one pooled
+httpx.AsyncClient per event loop, so concurrent calls don't serialize on
+round-trips.
+"""
+import asyncio
+import logging
+from typing import Any, Dict, Iterable, Optional, Type
+
+import httpx
+
+from waveassist import (
+    DataFrameFormat,
+    StoreDataType,
+    T,
+    _deserialize_fetched,
+    _fetch_params,
+    _store_payload,
+    call_llm,
+    invalidate_cache,
+)
+from waveassist.utils import _api_url, _json_loads, _json_request
+from waveassist.constants import (
+    ASYNC_HTTP_MAX_CONNECTIONS,
+    HTTP_POOL_SIZE,
+    HTTP_TIMEOUT,
+    HTTP_UPLOAD_MIN_BYTES,
+    HTTP_UPLOAD_TIMEOUT,
+)
+
+logger = logging.getLogger("waveassist")
+
+__all__ = ["afetch_data", "astore_data", "fetch_many", "acall_llm"]
+
+# Default number of in-flight requests for fetch_many.
+FETCH_MANY_CONCURRENCY = 8
+
+# An AsyncClient's connections belong to the loop that opened them, so keep one per loop.
+_CLIENT: Optional[httpx.AsyncClient] = None
+_CLIENT_LOOP: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _new_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=ASYNC_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_POOL_SIZE,
+        ),
+        timeout=httpx.Timeout(HTTP_TIMEOUT[1], connect=HTTP_TIMEOUT[0]),
+    )
+
+
+def _get_client() -> httpx.AsyncClient:
+    global _CLIENT, _CLIENT_LOOP
+    loop = asyncio.get_running_loop()
+    if _CLIENT is None or _CLIENT_LOOP is not loop:
+        _CLIENT = _new_client()
+        _CLIENT_LOOP = loop
+    return _CLIENT
+
+
+async def _call_api(method: str, path: str, **kwargs) -> tuple:
+    """Async counterpart of call_post_api / call_get_api: (success, data-or-error)."""
+    url = _api_url(path)
+    try:
+        response = await _get_client().request(method, url, **kwargs)
+        response_dict = _json_loads(response.content)
+        if str(response_dict.get("success")) == "1":
+            return True, response_dict.get("data", {}) if method == "GET" else response_dict
+        return False, response_dict.get("message", "Unknown error")
+    except Exception as e:
+        logger.error("API %s call failed: %s", method, e)
+        return False, str(e)
+
+
+async def astore_data(
+    key: str,
+    data: Any,
+    run_based: bool = False,
+    data_type: Optional[StoreDataType] = None,
+    data_format: DataFrameFormat = "records",
+) -> bool:
+    """Async store_data(): True if the store succeeded, False otherwise."""
+    payload = _store_payload(key, data, run_based, data_type, data_format)
+    content, headers = _json_request(payload)
+    timeout = httpx.USE_CLIENT_DEFAULT
+    if len(content) > HTTP_UPLOAD_MIN_BYTES:  # as call_post_api: no read limit on large bodies
+        timeout = httpx.Timeout(HTTP_UPLOAD_TIMEOUT[1], connect=HTTP_UPLOAD_TIMEOUT[0])
+    success, response = await _call_api(
+        "POST", "data/set_data_for_key/", content=content, headers=headers, timeout=timeout
+    )
+    invalidate_cache(key)  # as store_data: a cached fetch_data must not outlive the write
+    if not success:
+        logger.error("Error storing data: %s", response)
+    return success
+
+
+async def afetch_data(key: str, run_based: bool = False, default: Any = None) -> Any:
+    """Async fetch_data(): the stored value, or `default` on failure or missing key."""
+    params = _fetch_params(key, run_based)
+    success, response = await _call_api("GET", "data/fetch_data_for_key/", params=params)
+    if not success:
+        return default
+    return _deserialize_fetched(key, response, default)
+
+
+async def fetch_many(
+    keys: Iterable[str],
+    run_based: bool = False,
+    default: Any = None,
+    max_concurrency: int = FETCH_MANY_CONCURRENCY,
+) -> Dict[str, Any]:
+    """Fetch several keys concurrently, at most `max_concurrency` in flight.
+
+    Returns {key: value} in the order given; a key that fails maps to `default`.
+    """
+    keys = list(keys)
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def _one(key: str) -> Any:
+        async with semaphore:
+            return await afetch_data(key, run_based=run_based, default=default)
+
+    results = await asyncio.gather(*(_one(k) for k in keys), return_exceptions=True)
+    out = {}
+    for key, result in zip(keys, results):
+        if isinstance(result, BaseException):
+            if isinstance(result, RuntimeError):  # not initialized: same as fetch_data
+                raise result
+            logger.error("fetch_many: fetching key '%s' failed: %s", key, result)
+            result = default
+        out[key] = result
+    return out
+
+
+async def acall_llm(
+    model: str,
+    prompt: str,
+    response_model: Type[T],
+    should_retry: bool = False,
+    **kwargs,
+) -> T:
+    """Async call_llm(): runs the sync call on a worker thread.
+
+    Provider routing (OpenRouter, Azure, Claude CLI) lives in call_llm, so
+    this reuses it rather than keeping a parallel AsyncOpenAI code path;
+    several acall_llm()s under asyncio.gather still run concurrently.
+    """
+    return await asyncio.to_thread(
+        call_llm, model, prompt, response_model, should_retry=should_retry, **kwargs
+    )
@@ -4,7 +4,45 @@ API_BASE_URL = os.getenv("WAVEASSIST_API_BASE_URL", "https://api.waveassist.io")
 OPENROUTER_URL = "https://openrouter.ai/api/v1"
 DASHBOARD_URL = "https://app.waveassist.io"
 OPENROUTER_API_STORED_DATA_KEY = "open_router_key"
-UNSUPPORTED_JSON_MODELS_ARRAY = ["perplexity", "grok"]
+# Lowercase substrings of model names that reject response_format={"type": "json_object"}.
+UNSUPPORTED_JSON_MODELS_ARRAY = ("perplexity", "grok")
+# Model-name prefixes (after any "provider/") that support strict json_schema structured
+# outputs on chat.completions; call_llm sends them the schema instead of a JSON-mode prompt.
+STRUCTURED_OUTPUT_MODELS = ("gpt-4o-mini", "gpt-4.1", "gpt-5")
+
+# HTTP client for backend calls: one keep-alive session with pooled connections.
+HTTP_TIMEOUT = (3.05, 30)  # (connect, read) seconds
+# Uploads (store_data bodies over HTTP_UPLOAD_MIN_BYTES, send_email attachments) keep the
+# connect bound but no read limit: the read timeout also caps sending a large body.
+HTTP_UPLOAD_TIMEOUT = (HTTP_TIMEOUT[0], None)
+HTTP_UPLOAD_MIN_BYTES = 64 * 1024
+HTTP_POOL_CONNECTIONS = 16
+HTTP_POOL_SIZE = 32
+ASYNC_HTTP_MAX_CONNECTIONS = 64  # waveassist.aio: cap on concurrent connections per event loop
+# Retries cover connection errors, plus these statuses on idempotent (GET) calls only,
+# so a POST such as send_email is never replayed after the server received it.
+HTTP_RETRY_TOTAL = 2
+HTTP_RETRY_BACKOFF = 0.5
+HTTP_RETRY_STATUSES = (429, 500, 502, 503, 504)
+# Opt-in compression of large JSON request bodies: "gzip" or "zstd" (needs zstandard,
+# else gzip). Off by default, since the backend must accept the Content-Encoding.
+HTTP_REQUEST_ENCODING = os.getenv("WAVEASSIST_REQUEST_ENCODING", "").strip().lower()
+HTTP_COMPRESS_MIN_BYTES = 16 * 1024
+# Backend HTTP client: "requests" (default) or "httpx", which speaks HTTP/2 when the h2
+# package is installed (`pip install waveassist[http2]`).
+HTTP_BACKEND = os.getenv("WAVEASSIST_HTTP_BACKEND", "requests").strip().lower()
+
+# OpenAI-compatible clients used by call_llm: bound every request (seconds) and leave
+# retries to call_llm's own transport-retry loop instead of stacking the SDK's on top.
+# Half the SDK's 600s default, still room for reasoning / "pro" models on the
+# Responses API; a per-call timeout=... kwarg overrides it.
+LLM_REQUEST_TIMEOUT = 300.0
+LLM_CLIENT_MAX_RETRIES = 0
+
+# call_llm re-reads its provider config/keys from the backend at most this often (seconds).
+LLM_CONFIG_CACHE_TTL = 300
+# call_llm(cache="exact"): how long a cached response stays valid (seconds).
+LLM_RESPONSE_CACHE_TTL = 24 * 60 * 60
 
 # LLM provider selection (server-stored per-project setting)
 LLM_PROVIDER_STORED_DATA_KEY = "llm_provider"
@@ -2,30 +2,59 @@ import argparse
 import json
 import logging
 import os
+import re
 import sys
+import threading
 import uuid
 import time
 import webbrowser
 import requests
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 import zipfile
 import tempfile
 import shutil
 
-from waveassist.constants import API_BASE_URL, DASHBOARD_URL
+from waveassist.constants import API_BASE_URL, DASHBOARD_URL, HTTP_TIMEOUT
+from waveassist.utils import MultipartEncoder, _backoff, _build_session, _json_loads
 
 logger = logging.getLogger("waveassist")
 
 CONFIG_PATH = Path.home() / ".waveassist" / "config.json"
 
 
+@lru_cache(maxsize=1)
+def _session() -> requests.Session:
+    """Keep-alive session shared by the CLI commands (built on first use), so the
+    login poll loop and pull/push reuse one TLS connection."""
+    return _build_session()
+
+
+@lru_cache(maxsize=4)
+def _load_uid(config_path: Path):
+    """The saved login uid from `config_path`, or None when not logged in (read once per path)."""
+    try:
+        return _json_loads(config_path.read_bytes()).get("uid") or None
+    except FileNotFoundError:
+        return None
+
+
 def save_token(uid: str):
     CONFIG_PATH.parent.mkdir(parents=True, exist_ok=True)
     with open(CONFIG_PATH, "w") as f:
         json.dump({"uid": uid}, f)
+    _load_uid.cache_clear()
     logger.info("Logged in and saved to ~/.waveassist/config.json")
 
 
+# Login status polling: the first check runs right after the browser opens; the wait
+# between misses starts short and grows while the user signs in, so a slow login costs
+# a few dozen requests instead of one per second.
+_LOGIN_POLL_FIRST_DELAY = 0.25
+_LOGIN_POLL_MAX_DELAY = 4.0
+
+
 def login():
     session_id = str(uuid.uuid4())
     login_url = f"{DASHBOARD_URL}/login?session_id={session_id}"
@@ -34,12 +63,14 @@ def login():
 
     logger.info("Waiting for login to complete...")
 
+    status_url = f"{API_BASE_URL}/cli_login/session/{session_id}/status"
     max_wait = 180  # 3 minutes
     start_time = time.time()
+    delay = _LOGIN_POLL_FIRST_DELAY
 
     while time.time() - start_time < max_wait:
         try:
-            res = requests.get(f"{API_BASE_URL}/cli_login/session/{session_id}/status", timeout=3)
+            res = _session().get(status_url, timeout=3)
             if res.status_code == 200:
                 data = res.json()
                 success = data.get("success", '0')
@@ -50,46 +81,151 @@ def login():
                         return
         except Exception as e:
             logger.warning("Error checking login status. Retrying: %s", e)
-        time.sleep(1)
+        time.sleep(delay)
+        delay = min(delay * 1.5, _LOGIN_POLL_MAX_DELAY)
 
     logger.error("Login timed out. Please try again.")
     sys.exit(1)
 
 
 
-def pull(project_key: str, force=False):
-    if not CONFIG_PATH.exists():
-        logger.error("Not logged in. Run `waveassist login` first.")
-        return
+# Bundles up to this size are buffered in memory; larger ones spill to a temp file.
+_BUNDLE_SPOOL_MAX_BYTES = 128 << 20
+_PUSH_SPOOL_MAX_BYTES = 64 << 20
+_DOWNLOAD_CHUNK_BYTES = 1 << 20
+# pull asks for the first _RANGE_FIRST_BYTES only. A server that honours Range replies 206
+# with the total size, and the rest is fetched as up to _RANGE_PARTS parallel ranges, each
+# resumed from where it stopped on failure; any other server sends the whole bundle (200).
+_RANGE_FIRST_BYTES = 32 << 20
+_RANGE_PARTS = 4
+_RANGE_ATTEMPTS = 3
+_CONTENT_RANGE_TOTAL = re.compile(r"bytes \d+-\d+/(\d+)")
+
+
+def _range_total(res: requests.Response):
+    """Full bundle size from a 206 response's Content-Range, or None."""
+    if res.status_code != 206:
+        return None
+    match = _CONTENT_RANGE_TOTAL.fullmatch(res.headers.get("Content-Range", "").strip())
+    return int(match.group(1)) if match else None
+
+
+def _download_ranges(url: str, headers: dict, bundle, start: int, total: int) -> None:
+    """Fill bytes [start, total) of `bundle` with parallel Range requests."""
+    lock = threading.Lock()
+    step = -(-(total - start) // _RANGE_PARTS)
+
+    def fetch(first: int) -> None:
+        last = min(first + step, total) - 1
+        pos = first
+        for attempt in range(_RANGE_ATTEMPTS):
+            try:
+                with _session().get(
+                    url, headers={**headers, "Range": f"bytes={pos}-{last}"}, stream=True, timeout=HTTP_TIMEOUT
+                ) as res:  # releases the pooled connection on every exit, retries included
+                    if res.status_code != 206:
+                        raise OSError(f"range request returned status {res.status_code}")
+                    for chunk in res.iter_content(chunk_size=_DOWNLOAD_CHUNK_BYTES):
+                        chunk = chunk[:last + 1 - pos]
+                        with lock:
+                            bundle.seek(pos)
+                            bundle.write(chunk)
+                        pos += len(chunk)
+                if pos > last:
+                    return
+                error = OSError(f"bundle download ended early at byte {pos} of {total}")
+            except (requests.RequestException, OSError) as e:
+                error = e
+            if attempt + 1 == _RANGE_ATTEMPTS:
+                raise error
+            logger.warning("Bundle download interrupted at byte %s; resuming: %s", pos, error)
+            time.sleep(_backoff(attempt))
+
+    with ThreadPoolExecutor(max_workers=_RANGE_PARTS) as pool:
+        list(pool.map(fetch, range(start, total, step)))
+
+
+def _download_bundle(res: requests.Response, url: str = None, headers: dict = None) -> tempfile.SpooledTemporaryFile:
+    """Read a streamed bundle response into a rewound spooled file (ZipFile needs to seek).
+
+    If `res` is a partial (206) response, the rest of the bundle is fetched
+    from `url` with Range requests.
+    """
+    bundle = tempfile.SpooledTemporaryFile(max_size=_BUNDLE_SPOOL_MAX_BYTES)
+    for chunk in res.iter_content(chunk_size=_DOWNLOAD_CHUNK_BYTES):
+        bundle.write(chunk)
+    total = _range_total(res)
+    if total is not None and total > bundle.tell():
+        _download_ranges(url, headers or {}, bundle, bundle.tell(), total)
+    bundle.seek(0)
+    return bundle
+
+
+# pull's staging dir and backups sit in the project (renames need the same filesystem);
+# push skips anything left behind by a killed pull.
+_PULL_TEMP_PREFIX = ".waveassist-"
+
+
+def _remove_path(path: Path) -> None:
+    if path.is_dir() and not path.is_symlink():
+        shutil.rmtree(path)
+    else:
+        path.unlink()
+
 
-    with open(CONFIG_PATH) as f:
-        config = json.load(f)
+def _swap_into_place(src_dir: Path, dest_dir: Path) -> None:
+    """Move each top-level item of `src_dir` over its namesake in `dest_dir` by rename.
+
+    Existing items are first renamed aside and deleted only once every move
+    succeeded; on failure the items moved in are removed and the originals put
+    back, so a pull never leaves a half-replaced project.
+    """
+    backups = []
+    moved = []
+    try:
+        for item in src_dir.iterdir():
+            dest = dest_dir / item.name
+            if dest.exists() or dest.is_symlink():
+                backup = dest_dir / f"{_PULL_TEMP_PREFIX}bak-{uuid.uuid4().hex[:8]}-{item.name}"
+                os.replace(dest, backup)
+                backups.append((dest, backup))
+            os.replace(item, dest)
+            moved.append(dest)
+    except Exception:
+        for dest in reversed(moved):
+            _remove_path(dest)
+        for dest, backup in reversed(backups):
+            os.replace(backup, dest)
+        raise
+    for _, backup in backups:
+        _remove_path(backup)
 
-    uid = config.get("uid")
+
+def pull(project_key: str, force=False):
+    uid = _load_uid(CONFIG_PATH)
     if not uid:
-        logger.error("No uid found.")
+        logger.error("Not logged in. Run `waveassist login` first.")
         return
 
     logger.info("Pulling latest project bundle from WaveAssist...")
 
+    url = f"{API_BASE_URL}/cli/project/{project_key}/pull_bundle/"
+    headers = {"Authorization": f"Bearer {uid}"}
     try:
-        res = requests.get(
-            f"{API_BASE_URL}/cli/project/{project_key}/pull_bundle/",
-            headers={"Authorization": f"Bearer {uid}"},
-            stream=True
+        res = _session().get(
+            url,
+            headers={**headers, "Range": f"bytes=0-{_RANGE_FIRST_BYTES - 1}"},
+            stream=True,
+            timeout=HTTP_TIMEOUT,
         )
-        if res.status_code != 200:
+        if res.status_code not in (200, 206):
             logger.error("Failed to fetch bundle. Status: %s", res.status_code)
             logger.error("%s", res.text)
             return
 
-        with tempfile.TemporaryDirectory() as tmpdir:
-            zip_path = f"{tmpdir}/project.zip"
-            with open(zip_path, "wb") as f:
-                for chunk in res.iter_content(chunk_size=8192):
-                    f.write(chunk)
-
-            with zipfile.ZipFile(zip_path, "r") as zip_ref:
+        # Extract next to the project so files can be renamed into place (same filesystem)
+        with tempfile.TemporaryDirectory(dir=Path.cwd(), prefix=f"{_PULL_TEMP_PREFIX}pull-") as tmpdir:
+            with _download_bundle(res, url, headers) as bundle, zipfile.ZipFile(bundle, "r") as zip_ref:
                 zip_ref.extractall(tmpdir)
 
             logger.info("Downloaded and extracted bundle.")
@@ -103,19 +239,7 @@ def pull(project_key: str, force=False):
                     return
 
             # Overwrite local files
-            for item in Path(tmpdir).iterdir():
-                if item.name == "project.zip":
-                    continue
-                dest = Path.cwd() / item.name
-                if dest.exists():
-                    if dest.is_dir():
-                        shutil.rmtree(dest)
-                    else:
-                        dest.unlink()
-                if item.is_dir():
-                    shutil.copytree(item, dest)
-                else:
-                    shutil.copy(item, dest)
+            _swap_into_place(Path(tmpdir), Path.cwd())
 
         logger.info("Pull complete. Your local project is now up to date.")
     except Exception as e:
@@ -123,16 +247,59 @@ def pull(project_key: str, force=False):
 
 
 
-def push(project_key: str = None, force=False):
-    if not CONFIG_PATH.exists():
-        logger.error("Not logged in. Run `waveassist login` first.")
-        return
+# Directories never bundled by push (matched against whole path components, and never
+# descended into).
+_PUSH_IGNORED_DIRS = frozenset({".git", "__pycache__", ".venv", "node_modules"})
+
+
+def _is_env_file(name: str) -> bool:
+    """.env, .env.local, .envrc, prod.env, ... hold secrets (any name containing ".env", as before)."""
+    return ".env" in name
+
+
+def _iter_bundle_files(root: str, prefix: str = ""):
+    """Yield (path, archive name) for every file push bundles under `root`.
+
+    Archive names are built while walking instead of with os.path.relpath per
+    file; symlinked directories are not followed, as with os.walk.
+    """
+    with os.scandir(root) as entries:
+        for entry in entries:
+            if _is_env_file(entry.name) or entry.name.startswith(_PULL_TEMP_PREFIX):
+                continue
+            if entry.is_dir():
+                if entry.name not in _PUSH_IGNORED_DIRS and not entry.is_symlink():
+                    yield from _iter_bundle_files(entry.path, f"{prefix}{entry.name}/")
+            else:
+                yield entry.path, prefix + entry.name
+
+
+def _write_bundle(bundle_file, root: str = ".") -> None:
+    """Zip the project under `root` (deflate-compressed) into `bundle_file`, a path or binary file."""
+    with zipfile.ZipFile(bundle_file, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=6) as bundle:
+        for path, arcname in _iter_bundle_files(root):
+            bundle.write(path, arcname)
 
-    with open(CONFIG_PATH) as f:
-        config = json.load(f)
-    uid = config.get("uid")
+
+def _post_bundle(url: str, uid: str, bundle) -> requests.Response:
+    """Upload a bundle (bytes or an open file) as the "bundle" multipart part.
+
+    With requests-toolbelt installed the body is streamed from the file;
+    plain requests reads the whole bundle into memory to build it.
+    """
+    part = ("bundle.zip", bundle, "application/zip")
+    headers = {"Authorization": f"Bearer {uid}"}
+    if MultipartEncoder is not None:
+        encoder = MultipartEncoder(fields={"bundle": part})
+        headers["Content-Type"] = encoder.content_type
+        return _session().post(url, data=encoder, headers=headers)
+    return _session().post(url, headers=headers, files={"bundle": part})
+
+
+def push(project_key: str = None, force=False):
+    uid = _load_uid(CONFIG_PATH)
     if not uid:
-        logger.error("No token found in config.")
+        logger.error("Not logged in. Run `waveassist login` first.")
         return
 
     # Verify wa.json exists
@@ -141,33 +308,25 @@ def push(project_key: str = None, force=False):
         logger.error("Missing config.yaml in current directory.")
         return
 
-    # Create zip bundle
-    bundle_path = tempfile.NamedTemporaryFile(delete=False, suffix=".zip").name
-
-    with zipfile.ZipFile(bundle_path, "w") as bundle:
-        for root, _, files in os.walk("."):
-            for file in files:
-                rel_path = os.path.relpath(os.path.join(root, file), ".")
-                if ".git" in rel_path or ".env" in rel_path:
-                    continue
-                bundle.write(os.path.join(root, file), rel_path)
-
-    # Optional: Confirm before overwrite
-    if not force:
-        confirm = input(
-            "This will replace the code on WaveAssist with files listed in config.yml. Continue? (y/N): ")
-        if confirm.lower() != "y":
-            logger.info("Aborted.")
-            return
-
-    # Upload to backend
-    logger.info("Uploading bundle...")
-    with open(bundle_path, "rb") as f:
-        res = requests.post(
-            f"{API_BASE_URL}/cli/project/{project_key}/push_bundle/",
-            headers={"Authorization": f"Bearer {uid}"},
-            files={"bundle": ("bundle.zip", f, "application/zip")},
-        )
+    # Create zip bundle: in memory unless it outgrows the spool, then in an auto-deleted temp file
+    with tempfile.SpooledTemporaryFile(max_size=_PUSH_SPOOL_MAX_BYTES, suffix=".zip") as bundle_file:
+        _write_bundle(bundle_file)
+
+        # Optional: Confirm before overwrite
+        if not force:
+            confirm = input(
+                "This will replace the code on WaveAssist with files listed in config.yml. Continue? (y/N): ")
+            if confirm.lower() != "y":
+                logger.info("Aborted.")
+                return
+
+        # Upload to backend. A spooled (in-memory) bundle goes up as bytes: handing the
+        # spool itself to the multipart encoder would make it roll over to disk for fileno().
+        logger.info("Uploading bundle...")
+        size = bundle_file.tell()  # _write_bundle leaves the position at the end of the zip
+        bundle_file.seek(0)
+        bundle = bundle_file.read() if size <= _PUSH_SPOOL_MAX_BYTES else bundle_file
+        res = _post_bundle(f"{API_BASE_URL}/cli/project/{project_key}/push_bundle/", uid, bundle)
     if res.ok:
         logger.info("Project pushed to WaveAssist.")
     else:
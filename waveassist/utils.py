@@ -1,24 +1,260 @@
+import dataclasses
+import enum
+import gzip
 import logging
+import math
 import requests
 import json
+import random
 import re
+import sys
 import time
-from datetime import datetime
+import uuid
+from datetime import date, datetime, time as time_of_day
+import numpy as np
+from functools import lru_cache
+from types import UnionType
 from typing import Type, TypeVar, get_origin, get_args, Any, Union, Literal
 from pydantic import BaseModel
-from waveassist.constants import API_BASE_URL
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from waveassist.constants import (
+    API_BASE_URL,
+    HTTP_TIMEOUT,
+    HTTP_UPLOAD_TIMEOUT,
+    HTTP_UPLOAD_MIN_BYTES,
+    HTTP_POOL_CONNECTIONS,
+    HTTP_POOL_SIZE,
+    HTTP_RETRY_TOTAL,
+    HTTP_RETRY_BACKOFF,
+    HTTP_RETRY_STATUSES,
+    HTTP_REQUEST_ENCODING,
+    HTTP_COMPRESS_MIN_BYTES,
+    HTTP_BACKEND,
+)
+
+try:
+    import orjson  # optional: `pip install waveassist[fast]`
+except ImportError:
+    orjson = None  # type: ignore[assignment]
+
+try:
+    import zstandard  # optional: `pip install waveassist[zstd]`
+except ImportError:
+    zstandard = None  # type: ignore[assignment]
+
+try:
+    from requests_toolbelt import MultipartEncoder  # optional: `pip install waveassist[stream]`
+except ImportError:
+    MultipartEncoder = None  # type: ignore[assignment,misc]
 
 logger = logging.getLogger("waveassist")
 
+if orjson is not None:
+    # int dict keys, numpy values and naive datetimes encode instead of raising.
+    _ORJSON_DUMPS_OPTS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NAIVE_UTC
+
+
+def _json_default(obj: Any) -> Any:
+    """stdlib json hook for the types orjson encodes natively (with _ORJSON_DUMPS_OPTS),
+    so a value is sent the same way whether or not orjson is installed."""
+    if isinstance(obj, np.datetime64):
+        obj = obj.astype("datetime64[us]").item()
+        if obj is None:
+            raise TypeError("NaT is not JSON serializable")  # as orjson
+    elif isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, datetime):
+        return obj.isoformat() + ("+00:00" if obj.tzinfo is None else "")
+    if isinstance(obj, (date, time_of_day)):
+        return obj.isoformat()
+    if isinstance(obj, enum.Enum):
+        return obj.value
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return dataclasses.asdict(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _non_finite_to_none(obj: Any) -> Any:
+    """Copy of `obj` with NaN/inf floats (numpy ones included) replaced by None."""
+    if isinstance(obj, float):  # np.float64 too
+        return obj if math.isfinite(obj) else None
+    if isinstance(obj, dict):
+        return {k: _non_finite_to_none(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_non_finite_to_none(v) for v in obj]
+    if isinstance(obj, (np.generic, np.ndarray)):
+        return _non_finite_to_none(_json_default(obj))
+    return obj
+
+
+def _json_dumps(obj: Any) -> bytes:
+    """Compact JSON bytes for a request body; orjson when installed.
+
+    Both encoders accept numpy values, datetimes (naive ones as UTC), UUIDs,
+    enums and dataclasses, and send NaN/inf as null. Other values raise
+    TypeError (ValueError for circular references under stdlib json).
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, option=_ORJSON_DUMPS_OPTS)
+    try:
+        text = json.dumps(obj, separators=(",", ":"), allow_nan=False, default=_json_default)
+    except ValueError as e:
+        if "Out of range float" not in str(e):
+            raise
+        # orjson writes non-finite floats as null; only pay for the copy when there are some
+        text = json.dumps(
+            _non_finite_to_none(obj), separators=(",", ":"), allow_nan=False, default=_json_default
+        )
+    return text.encode("utf-8")
+
+
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+
+@lru_cache(maxsize=64)
+def _api_url(path: str) -> str:
+    """Absolute backend URL for an API path; the SDK only ever calls a handful of paths."""
+    return f"{API_BASE_URL}/{path}"
+
+
+def _json_request(body: Any) -> tuple:
+    """(encoded body, headers) for a JSON POST.
+
+    Bodies over HTTP_COMPRESS_MIN_BYTES are compressed when
+    WAVEASSIST_REQUEST_ENCODING is "gzip" or "zstd" (gzip if zstandard
+    isn't installed).
+    """
+    data = _json_dumps(body)
+    headers = _JSON_HEADERS
+    if HTTP_REQUEST_ENCODING in ("gzip", "zstd") and len(data) > HTTP_COMPRESS_MIN_BYTES:
+        headers = dict(_JSON_HEADERS)
+        if HTTP_REQUEST_ENCODING == "zstd" and zstandard is not None:
+            data = zstandard.ZstdCompressor(level=3).compress(data)
+            headers["Content-Encoding"] = "zstd"
+        else:
+            data = gzip.compress(data, compresslevel=5)
+            headers["Content-Encoding"] = "gzip"
+    return data, headers
+
+
+def _json_loads(data: Union[str, bytes]) -> Any:
+    """Parse JSON text or bytes; errors are json.JSONDecodeError (orjson's subclasses it)."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
 T = TypeVar('T', bound=BaseModel)
 
 
-def call_post_api(path, body) -> tuple:
-    url = f"{API_BASE_URL}/{path}"
-    headers = { "Content-Type": "application/json" }  # JSON content
+def _backoff(attempt: int, base: float = 1.0) -> float:
+    """Seconds to wait before retry number `attempt` + 1: exponential, with +/-50% jitter
+    so workers that failed together don't all retry in the same instant."""
+    return base * (2 ** attempt) * random.uniform(0.5, 1.5)
+
+
+def _build_session(pool_size: int = HTTP_POOL_SIZE) -> requests.Session:
+    """A keep-alive session, so back-to-back backend calls reuse a warm TLS connection."""
+    retry = Retry(
+        total=HTTP_RETRY_TOTAL,
+        backoff_factor=HTTP_RETRY_BACKOFF,
+        status_forcelist=HTTP_RETRY_STATUSES,
+        raise_on_status=False,  # hand the last error response to the caller, as before
+    )
+    adapter = HTTPAdapter(
+        pool_connections=HTTP_POOL_CONNECTIONS, pool_maxsize=pool_size, max_retries=retry
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+class _HttpxSession:
+    """The slice of requests.Session the call_* helpers use, backed by one httpx.Client.
+
+    Multiplexes calls over HTTP/2 when h2 is installed. Connection errors are
+    retried by the transport; unlike _build_session, statuses are not.
+    """
+
+    def __init__(self, pool_size: int = HTTP_POOL_SIZE, transport=None):
+        import httpx
+
+        try:
+            import h2  # noqa: F401  # optional: `pip install waveassist[http2]`
+            http2 = True
+        except ImportError:
+            http2 = False
+        if transport is None:
+            transport = httpx.HTTPTransport(
+                http2=http2,
+                retries=HTTP_RETRY_TOTAL,
+                limits=httpx.Limits(
+                    max_keepalive_connections=HTTP_POOL_CONNECTIONS, max_connections=pool_size
+                ),
+            )
+        self._httpx = httpx
+        self._client = httpx.Client(transport=transport)
+
+    def _timeout(self, timeout):
+        if isinstance(timeout, tuple):  # requests-style (connect, read)
+            return self._httpx.Timeout(timeout[1], connect=timeout[0])
+        return timeout
+
+    def post(self, url, data=None, files=None, headers=None, timeout=HTTP_TIMEOUT):
+        if isinstance(data, (bytes, str)):
+            return self._client.post(url, content=data, headers=headers, timeout=self._timeout(timeout))
+        return self._client.post(
+            url, data=data, files=files or None, headers=headers, timeout=self._timeout(timeout)
+        )
+
+    def get(self, url, params=None, headers=None, timeout=HTTP_TIMEOUT):
+        if params:
+            # requests leaves out None-valued params; httpx would send them as empty strings
+            params = {k: v for k, v in params.items() if v is not None}
+        return self._client.get(url, params=params, headers=headers, timeout=self._timeout(timeout))
+
+    def close(self) -> None:
+        self._client.close()
+
+
+def _build_api_session(pool_size: int = HTTP_POOL_SIZE):
+    """Client for the SDK's backend calls, per WAVEASSIST_HTTP_BACKEND."""
+    if HTTP_BACKEND == "httpx":
+        try:
+            return _HttpxSession(pool_size)
+        except ImportError:
+            logger.warning("WAVEASSIST_HTTP_BACKEND=httpx but httpx is not installed; using requests.")
+    return _build_session(pool_size)
+
+
+_SESSION = _build_api_session()
+_SESSION_POOL_SIZE = HTTP_POOL_SIZE
+
+
+def configure_http_session(pool_size: int) -> None:
+    """Resize the backend connection pool (e.g. for many worker threads)."""
+    global _SESSION, _SESSION_POOL_SIZE
+    if pool_size != _SESSION_POOL_SIZE:
+        old_session, _SESSION = _SESSION, _build_api_session(pool_size)
+        _SESSION_POOL_SIZE = pool_size
+        old_session.close()  # release the old pool's connections
+
+
+def call_post_api(path, body, timeout=None) -> tuple:
+    url = _api_url(path)
     try:
-        response = requests.post(url, json=body, headers=headers)  # Sends proper JSON
-        response_dict = response.json()
+        # Pre-encoded, so requests doesn't re-encode the body with stdlib json
+        data, headers = _json_request(body)
+        if timeout is None:
+            timeout = HTTP_UPLOAD_TIMEOUT if len(data) > HTTP_UPLOAD_MIN_BYTES else HTTP_TIMEOUT
+        response = _SESSION.post(url, data=data, headers=headers, timeout=timeout)
+        response_dict = _json_loads(response.content)
 
         if str(response_dict.get("success")) == "1":
             return True, response_dict
@@ -29,11 +265,34 @@ def call_post_api(path, body) -> tuple:
         logger.error("API call failed: %s", e)
         return False, str(e)
 
-def call_post_api_with_files(path, body, files=None) -> tuple:
-    url = f"{API_BASE_URL}/{path}"
+def _streamable(files: dict) -> bool:
+    """MultipartEncoder needs each part's length up front: real files or seekable streams."""
+    for part in files.values():
+        fileobj = part[1] if isinstance(part, tuple) else part
+        if not (hasattr(fileobj, "fileno") or (hasattr(fileobj, "seek") and hasattr(fileobj, "tell"))):
+            return False
+    return True
+
+
+def call_post_api_with_files(path, body, files=None, timeout=None) -> tuple:
+    url = _api_url(path)
+    if timeout is None:
+        timeout = HTTP_UPLOAD_TIMEOUT if files else HTTP_TIMEOUT
     try:
-        response = requests.post(url, data=body, files=files or {})
-        response_dict = response.json()
+        if (
+            files
+            and MultipartEncoder is not None
+            and not isinstance(_SESSION, _HttpxSession)  # httpx streams file parts itself
+            and _streamable(files)
+        ):
+            # Streams file parts in chunks instead of buffering the whole body in memory
+            encoder = MultipartEncoder(fields={**body, **files})
+            response = _SESSION.post(
+                url, data=encoder, headers={"Content-Type": encoder.content_type}, timeout=timeout
+            )
+        else:
+            response = _SESSION.post(url, data=body, files=files or {}, timeout=timeout)
+        response_dict = _json_loads(response.content)
         if str(response_dict.get("success")) == "1":
             return True, response_dict
         else:
@@ -46,11 +305,10 @@ def call_post_api_with_files(path, body, files=None) -> tuple:
 
 
 def call_get_api(path, params) -> tuple:
-    url = f"{API_BASE_URL}/{path}"
-    headers = { "Content-Type": "application/json" }
+    url = _api_url(path)
     try:
-        response = requests.get(url, params=params, headers=headers)
-        response_dict = response.json()
+        response = _SESSION.get(url, params=params, headers=_JSON_HEADERS, timeout=HTTP_TIMEOUT)
+        response_dict = _json_loads(response.content)
 
         if str(response_dict.get("success")) == "1":
             return True, response_dict.get("data", {})
@@ -65,99 +323,266 @@ def call_get_api(path, params) -> tuple:
 
 
 
+# Filtered out of Optional[X] / X | None unions.
+_NONE = type(None)
+
+# Display names for plain (non-generic) annotations; one dict lookup instead of
+# walking the generic-origin checks below.
+_BASIC_TYPE_NAMES = {str: "str", int: "int", float: "float", bool: "bool"}
+# Their ready-made "<type>" placeholders, built once so the common case skips formatting.
+_BASIC_PLACEHOLDERS = {t: sys.intern(f"<{name}>") for t, name in _BASIC_TYPE_NAMES.items()}
+
+
+@lru_cache(maxsize=1024)
+def _inspect_cached(annotation: Any) -> tuple:
+    return get_origin(annotation), get_args(annotation)
+
+
+def _inspect(annotation: Any) -> tuple:
+    """(get_origin, get_args) for an annotation, memoized.
+
+    The same annotations (Optional[str], List[int], ...) recur across fields
+    and models, and typing's introspection is not free.
+    """
+    try:
+        return _inspect_cached(annotation)
+    except TypeError:  # unhashable annotation
+        return get_origin(annotation), get_args(annotation)
+
+
+def _union_type_name(args: tuple) -> str:
+    # Optional[X] (Union[X, None]) shows as X
+    non_none_args = tuple(a for a in args if a is not _NONE)
+    if len(non_none_args) == 1:
+        return _get_type_name(non_none_args[0])
+    return " | ".join(_get_type_name(a) for a in non_none_args)
+
+
+def _literal_type_name(args: tuple) -> str:
+    # Show the allowed values
+    return " | ".join(repr(a) for a in args)
+
+
+def _list_type_name(args: tuple) -> str:
+    if args:
+        return f"list[{_get_type_name(args[0])}]"
+    return "list"
+
+
+def _dict_type_name(args: tuple) -> str:
+    if args and len(args) == 2:
+        return f"dict[{_get_type_name(args[0])}, {_get_type_name(args[1])}]"
+    return "dict"
+
+
+# get_origin() -> name renderer for generic annotations (typing.Union and X | Y alike).
+_ORIGIN_TYPE_NAMES = {
+    Union: _union_type_name,
+    UnionType: _union_type_name,
+    Literal: _literal_type_name,
+    list: _list_type_name,
+    dict: _dict_type_name,
+}
+
+
 def _get_type_name(annotation: Any) -> str:
     """Get a clean type name from a type annotation."""
     if annotation is None:
         return "null"
-    
-    origin = get_origin(annotation)
-    
-    # Handle Optional types (Union[X, None])
-    if origin is Union:
-        args = get_args(annotation)
-        non_none_args = [a for a in args if a is not type(None)]
-        if len(non_none_args) == 1:
-            return _get_type_name(non_none_args[0])
-        return " | ".join(_get_type_name(a) for a in non_none_args)
-    
-    # Handle Literal (show allowed values)
-    if origin is Literal:
-        args = get_args(annotation)
-        return " | ".join(repr(a) for a in args)
-
-    # Handle List, Dict, etc.
-    if origin is list:
-        args = get_args(annotation)
-        if args:
-            return f"list[{_get_type_name(args[0])}]"
-        return "list"
-    
-    if origin is dict:
-        args = get_args(annotation)
-        if args and len(args) == 2:
-            return f"dict[{_get_type_name(args[0])}, {_get_type_name(args[1])}]"
-        return "dict"
-    
-    # Handle Pydantic BaseModel (nested models)
-    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
-        return annotation.__name__
-    
-    # Handle basic types
+
+    try:
+        basic = _BASIC_TYPE_NAMES.get(annotation)
+    except TypeError:  # unhashable annotation
+        basic = None
+    if basic is not None:
+        return basic
+
+    origin, args = _inspect(annotation)
+    handler = _ORIGIN_TYPE_NAMES.get(origin)
+    if handler is not None:
+        return handler(args)
+
+    # Pydantic models and other classes
     if hasattr(annotation, '__name__'):
         return annotation.__name__
-    
+
     return str(annotation)
 
 
-def _generate_template_value(field_annotation: Any, field_description: str | None) -> Any:
-    """Generate a template value for a field, handling nested models."""
-    # Check if it's a Pydantic model (nested)
-    origin = get_origin(field_annotation)
-    
-    # Handle Optional types
-    if origin is Union:
-        args = get_args(field_annotation)
-        non_none_args = [a for a in args if a is not type(None)]
-        if non_none_args:
-            return _generate_template_value(non_none_args[0], field_description)
-    
-    # Handle List of Pydantic models
-    if origin is list:
-        args = get_args(field_annotation)
-        if args and isinstance(args[0], type) and issubclass(args[0], BaseModel):
-            return [generate_json_template_dict(args[0])]
-        elif args:
-            return [f"<{_get_type_name(args[0])}>"]
-        return ["<item>"]
-    
-    # Handle nested Pydantic model
-    if isinstance(field_annotation, type) and issubclass(field_annotation, BaseModel):
-        return generate_json_template_dict(field_annotation)
-    
+def _is_model(annotation: Any) -> bool:
+    return isinstance(annotation, type) and issubclass(annotation, BaseModel)
+
+
+def _nested_template(model: Type[BaseModel], field_description: str | None, walk: tuple) -> Any:
+    """Empty dict for a nested model, queued on the walk's work stack to be filled in.
+
+    A model that is already among its own ancestors (a self-referencing model)
+    becomes a "<ModelName>" placeholder instead of expanding forever.
+    """
+    pending, ancestors = walk
+    if model in ancestors:
+        return _placeholder(model.__name__, field_description)
+    child: dict = {}
+    pending.append((child, model, ancestors))
+    return child
+
+
+def _union_template_value(args: tuple, field_description: str | None, walk: tuple) -> Any:
+    # Optional[X]: template the first non-None member
+    first = next((a for a in args if a is not _NONE), _NONE)
+    if first is not _NONE:
+        return _generate_template_value(first, field_description, walk)
+    return _placeholder(_union_type_name(args), field_description)
+
+
+def _list_template_value(args: tuple, field_description: str | None, walk: tuple) -> Any:
+    # List of Pydantic models expands one example item; lists show structure, not description
+    if args and _is_model(args[0]):
+        return [_nested_template(args[0], None, walk)]
+    elif args:
+        return [_basic_placeholder(args[0]) or _placeholder(_get_type_name(args[0]), None)]
+    return ["<item>"]
+
+
+# get_origin() -> template builder for annotations whose template is not a plain placeholder.
+_ORIGIN_TEMPLATE_VALUES = {
+    Union: _union_template_value,
+    UnionType: _union_template_value,
+    list: _list_template_value,
+}
+
+
+def _placeholder(type_str: str, field_description: str | None) -> str:
     # Always include type; append description when present
-    type_str = _get_type_name(field_annotation)
     if field_description:
         return f"<{type_str}> {field_description}"
     return f"<{type_str}>"
 
 
-def generate_json_template_dict(model: Type[BaseModel]) -> dict:
-    """Generate a template dictionary showing the structure and descriptions."""
-    template = {}
-    for name, field in model.model_fields.items():
-        template[name] = _generate_template_value(field.annotation, field.description)
+def _basic_placeholder(annotation: Any) -> str | None:
+    """The interned "<type>" placeholder for str/int/float/bool, else None."""
+    try:
+        return _BASIC_PLACEHOLDERS.get(annotation)
+    except TypeError:  # unhashable annotation
+        return None
+
+
+def _generate_template_value(field_annotation: Any, field_description: str | None, walk: tuple) -> Any:
+    """Generate a template value for a field.
+
+    Nested models come back as empty dicts that `walk` (the caller's
+    (pending, ancestors) work state) has queued for filling.
+    """
+    origin, args = _inspect(field_annotation)
+    if origin is not None:
+        handler = _ORIGIN_TEMPLATE_VALUES.get(origin)
+        if handler is not None:
+            return handler(args, field_description, walk)
+    else:
+        placeholder = _basic_placeholder(field_annotation)
+        if placeholder is not None:
+            return f"{placeholder} {field_description}" if field_description else placeholder
+        if _is_model(field_annotation):
+            # Nested Pydantic model
+            return _nested_template(field_annotation, field_description, walk)
+
+    return _placeholder(_get_type_name(field_annotation), field_description)
+
+
+@lru_cache(maxsize=256)
+def _build_template_dict(model: Type[BaseModel]) -> dict:
+    """Build (once per model class) the template dict. Shared; never mutate the result.
+
+    Walks nested models with an explicit stack of (dict to fill, model,
+    ancestors) items rather than recursing once per nesting level. Each
+    nested dict is placed in its parent in field order before it is filled,
+    so key order matches the model definitions.
+    """
+    root: dict = {}
+    pending: list = [(root, model, ())]
+    while pending:
+        target, model_cls, ancestors = pending.pop()
+        walk = (pending, ancestors + (model_cls,))
+        for name, field in model_cls.model_fields.items():
+            target[name] = _generate_template_value(field.annotation, field.description, walk)
+    return root
+
+
+def _copy_template(value: Any) -> Any:
+    """Copy the dict/list skeleton of a template; the leaf strings are immutable and shared."""
+    if isinstance(value, dict):
+        return {k: _copy_template(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_copy_template(v) for v in value]
+    return value
+
+
+# Class attribute under which JsonTemplateModel subclasses keep their template.
+_TEMPLATE_ATTR = "__waveassist_template__"
+
+
+class JsonTemplateModel(BaseModel):
+    """Optional base for LLM response models: the JSON template is built once,
+    when the class is defined, and kept on the class.
+
+    Plain BaseModel subclasses work everywhere too; their templates are
+    cached on first use instead.
+    """
+
+    @classmethod
+    def __pydantic_init_subclass__(cls, **kwargs: Any) -> None:
+        super().__pydantic_init_subclass__(**kwargs)
+        # Models with unresolved forward refs build lazily, after model_rebuild().
+        if cls.__pydantic_complete__:
+            setattr(cls, _TEMPLATE_ATTR, _build_template_dict(cls))
+
+
+def _template_for(model: Type[BaseModel]) -> dict:
+    template = model.__dict__.get(_TEMPLATE_ATTR)
+    if template is None:
+        template = _build_template_dict(model)
+        if issubclass(model, JsonTemplateModel):
+            setattr(model, _TEMPLATE_ATTR, template)
     return template
 
 
-def generate_json_template(model: Type[BaseModel]) -> str:
-    """Generate a clean JSON string showing the structure and descriptions."""
-    return json.dumps(generate_json_template_dict(model), indent=2)
+def generate_json_template_dict(model: Type[BaseModel]) -> dict:
+    """Generate a template dictionary showing the structure and descriptions.
+
+    Templates are cached per model class; callers get a fresh copy they may mutate.
+    """
+    return _copy_template(_template_for(model))
+
+
+@lru_cache(maxsize=256)
+def generate_json_template(model: Type[BaseModel], compact: bool = False) -> str:
+    """Generate a clean JSON string showing the structure and descriptions.
+
+    compact=True emits single-line JSON without whitespace padding: fewer
+    prompt tokens, and the encoder's faster path. Uses orjson when installed.
+    """
+    template = _template_for(model)
+    # Both encoders produce the same text, so prompts don't depend on whether orjson is installed.
+    if orjson is not None:
+        return orjson.dumps(template, option=0 if compact else orjson.OPT_INDENT_2).decode()
+    if compact:
+        return json.dumps(template, separators=(",", ":"), ensure_ascii=False)
+    return json.dumps(template, indent=2, ensure_ascii=False)
+
+
+# Scanner tokens for _find_balanced_json: a whole string literal (consumed in C, so
+# brackets inside it are never seen), an escape outside a string, a bracket, or a
+# lone quote that opens a string which never closes.
+_JSON_SCAN_TOKENS = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"|\\.|[\[\]{}]|"', re.DOTALL)
 
 
 def _find_balanced_json(content: str, start_char: str, end_char: str) -> str | None:
     """
     Find a balanced JSON object or array starting from the first occurrence of start_char.
-    
+
+    Walks tokens from a compiled regex (string literals, escapes, brackets)
+    instead of stepping through every character in Python.
+
     Args:
         content: Content to search in
         start_char: Opening character ('{' or '[')
@@ -169,37 +594,21 @@ def _find_balanced_json(content: str, start_char: str, end_char: str) -> str | N
     start_idx = content.find(start_char)
     if start_idx == -1:
         return None
-    
+
     depth = 0
-    in_string = False
-    escape_next = False
-    
-    for i in range(start_idx, len(content)):
-        char = content[i]
-        
-        if escape_next:
-            escape_next = False
-            continue
-        
-        if char == '\\':
-            escape_next = True
-            continue
-        
-        if char == '"' and not escape_next:
-            in_string = not in_string
-            continue
-        
-        if not in_string:
-            if char == start_char:
-                depth += 1
-            elif char == end_char:
-                depth -= 1
-                if depth == 0:
-                    # Found matching closing brace/bracket
-                    return content[start_idx:i + 1]
-    
-    return None
+    for match in _JSON_SCAN_TOKENS.finditer(content, start_idx):
+        token = match.group()
+        if token == start_char:
+            depth += 1
+        elif token == end_char:
+            depth -= 1
+            if depth == 0:
+                # Found matching closing brace/bracket
+                return content[start_idx:match.end()]
+        elif token == '"':
+            return None  # unterminated string: nothing after it can close the match
 
+    return None
 
 
 def extract_json_from_content(content: str) -> Union[dict, list]:
@@ -223,7 +632,7 @@ def extract_json_from_content(content: str) -> Union[dict, list]:
     
     # Strategy 1: Try parsing directly (content is pure JSON)
     try:
-        return json.loads(content)
+        return _json_loads(content)
     except json.JSONDecodeError:
         pass
     
@@ -231,7 +640,7 @@ def extract_json_from_content(content: str) -> Union[dict, list]:
     json_block_match = re.search(r'```json\s*([\s\S]*?)\s*```', content)
     if json_block_match:
         try:
-            return json.loads(json_block_match.group(1).strip())
+            return _json_loads(json_block_match.group(1).strip())
         except json.JSONDecodeError:
             pass
     
@@ -239,7 +648,7 @@ def extract_json_from_content(content: str) -> Union[dict, list]:
     code_block_match = re.search(r'```\s*([\s\S]*?)\s*```', content)
     if code_block_match:
         try:
-            return json.loads(code_block_match.group(1).strip())
+            return _json_loads(code_block_match.group(1).strip())
         except json.JSONDecodeError:
             pass
     
@@ -247,7 +656,7 @@ def extract_json_from_content(content: str) -> Union[dict, list]:
     json_object_str = _find_balanced_json(content, '{', '}')
     if json_object_str:
         try:
-            return json.loads(json_object_str)
+            return _json_loads(json_object_str)
         except json.JSONDecodeError:
             pass
     
@@ -255,7 +664,7 @@ def extract_json_from_content(content: str) -> Union[dict, list]:
     json_array_str = _find_balanced_json(content, '[', ']')
     if json_array_str:
         try:
-            return json.loads(json_array_str)
+            return _json_loads(json_array_str)
         except json.JSONDecodeError:
             pass
     
@@ -263,7 +672,7 @@ def extract_json_from_content(content: str) -> Union[dict, list]:
     try:
         import json_repair
         repaired = json_repair.repair_json(content)
-        return json.loads(repaired)
+        return _json_loads(repaired)
     except (ImportError, Exception):
         # json_repair not available or failed, continue to error
         pass
@@ -392,21 +801,26 @@ def parse_json_response(content: str, response_model: Type[T], model: str) -> T:
         )
 
 
-def create_json_prompt(prompt: str, response_model: Type[BaseModel]) -> str:
+# Fixed text wrapped around the model template by create_json_prompt.
+_JSON_PROMPT_INSTRUCTIONS = "Respond with a JSON object following this structure:\n"
+_JSON_PROMPT_CLOSING = "Return ONLY the JSON object, no explanations or other text. Return JSON now:"
+
+
+def create_json_prompt(
+    prompt: str,
+    response_model: Type[BaseModel],
+    human_readable: bool = False,
+) -> str:
     """
     Create a prompt that requests JSON output matching a Pydantic model structure.
     
     Args:
         prompt: Original user prompt
         response_model: Pydantic model class to generate template from
+        human_readable: If True, embed the template indented instead of compact
         
     Returns:
         Enhanced prompt with JSON structure instructions
     """
-    template = generate_json_template(response_model)
-    return f"""{prompt}
-    
-    Respond with a JSON object following this structure:
-    {template}
-    
-    Return ONLY the JSON object, no explanations or other text. Return JSON now:"""
\ No newline at end of file
+    template = generate_json_template(response_model, compact=not human_readable)
+    return f"{prompt}\n\n{_JSON_PROMPT_INSTRUCTIONS}{template}\n\n{_JSON_PROMPT_CLOSING}"
\ No newline at end of file